@@ -0,0 +1,183 @@
+"""
+Inter-rater agreement: how closely judges agree on the contestants they both
+saw, and how consistently each category's contestants are told apart.
+
+Both start from the contestant x judge x criterion score tensor, kept sparse:
+one cell per (contestant, judge) pair that has scores, averaging repeats.
+Pairs of judges are found by joining the cells of each contestant with each
+other, so the work is in the number of judges per contestant (a handful),
+never in judges squared times contestants; every sum is then a bincount by
+pair of judges.
+"""
+
+from __future__ import annotations
+from scorestore import *
+import numpy as np
+
+class JudgeAgreement:
+    """
+    For every pair of judges who share a contestant (by judge codes in the
+    store, the lower first), per criterion: the number of shared contestants
+    with both scores, the correlation of their scores and the mean absolute
+    difference, NaN where undefined (fewer than 2 shared for correlation,
+    none for the difference, or no variance). Only pairs that share a
+    contestant are kept, so memory follows the pairs rather than judges
+    squared.
+    """
+    judges: list[Judge]
+    pair_judges: np.ndarray # pair x 2, judge codes
+    shared: np.ndarray # pair, contestants with any score from both
+    n: np.ndarray # criterion x pair
+    correlation: np.ndarray # criterion x pair
+    mad: np.ndarray # criterion x pair
+
+    def __init__(self: JudgeAgreement, store: ScoreStore):
+        self.judges = list(store.items['judge'])
+        n_judges = len(self.judges)
+
+        (cell_contestants, cell_judges, cell_scores) = score_tensor(store)
+        (left, right) = pairs_within(cell_contestants)
+
+        # Each unordered pair once; a contestant's cells are of distinct judges
+        lower = cell_judges[left] < cell_judges[right]
+        (left, right) = (left[lower], right[lower])
+
+        (pair_codes, pairs) = np.unique((cell_judges[left] * n_judges) + cell_judges[right], return_inverse=True)
+        n_pairs = len(pair_codes)
+
+        self.pair_judges = np.stack((pair_codes // n_judges, pair_codes % n_judges), axis=1)
+        self.shared = np.bincount(pairs, minlength=n_pairs)
+
+        self.n = np.empty((N_CRITERIA, n_pairs))
+        self.correlation = np.empty_like(self.n)
+        self.mad = np.empty_like(self.n)
+
+        for k in range(N_CRITERIA):
+            x, y = cell_scores[left, k], cell_scores[right, k]
+            both = ~(np.isnan(x) | np.isnan(y))
+            (x, y, kpairs) = (x[both], y[both], pairs[both])
+
+            def _sum(weights: np.ndarray) -> np.ndarray:
+                return np.bincount(kpairs, weights, n_pairs)
+
+            n = _sum(None)
+            (sx, sy, sxx, syy, sxy) = (_sum(x), _sum(y), _sum(x * x), _sum(y * y), _sum(x * y))
+
+            with np.errstate(divide='ignore', invalid='ignore'):
+                cov = (n * sxy) - (sx * sy)
+                var = ((n * sxx) - (sx * sx)) * ((n * syy) - (sy * sy))
+                corr = cov / np.sqrt(var)
+                corr[(n < 2) | (var <= 0)] = np.nan
+
+                mad = _sum(np.abs(x - y)) / n
+
+            self.n[k], self.correlation[k], self.mad[k] = n, corr, mad
+
+    def pairs(self: JudgeAgreement, min_shared: int=1) -> list[tuple[Judge, Judge, int, list[float], list[float]]]:
+        """
+        Each pair of judges sharing at least min_shared contestants, once:
+        judge, judge, shared, correlations and mean absolute differences per
+        criterion (rounded, None where undefined). Most disagreeing first,
+        by mean absolute difference over the criteria.
+        """
+        kept = np.flatnonzero(self.shared >= min_shared)
+        with np.errstate(invalid='ignore'):
+            order = kept[np.argsort(-np.nan_to_num(np.nanmean(self.mad[:, kept], axis=0), nan=-1), kind='stable')]
+
+        def _round(values: np.ndarray) -> list[float]:
+            return [None if np.isnan(v) else round(float(v), 2) for v in values]
+
+        return [
+            (self.judges[p], self.judges[q], int(self.shared[i]), _round(self.correlation[:, i]), _round(self.mad[:, i]))
+            for (i, (p, q)) in zip(order, self.pair_judges[order])
+        ]
+
+def score_tensor(store: ScoreStore) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    The sparse contestant x judge x criterion tensor as (contestant codes,
+    judge codes, scores) per cell, sorted by contestant. A judge seeing a
+    contestant more than once counts as their average, per criterion.
+    """
+    n_judges = len(store.items['judge'])
+    codes = (store.column('contestant') * n_judges) + store.column('judge')
+    (cells, inverse) = np.unique(codes, return_inverse=True)
+
+    scores = store.scores
+    present = ~np.isnan(scores)
+    cell_scores = np.empty((len(cells), N_CRITERIA))
+
+    for k in range(N_CRITERIA):
+        sums = np.bincount(inverse[present[:, k]], scores[present[:, k], k], len(cells))
+        counts = np.bincount(inverse[present[:, k]], minlength=len(cells))
+        with np.errstate(invalid='ignore'):
+            cell_scores[:, k] = sums / counts
+
+    return cells // n_judges, cells % n_judges, cell_scores
+
+def pairs_within(groups: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Every ordered pair (i, j), i != j, of indices with the same (sorted) group,
+    without a loop: each index is repeated once per member of its group, and
+    paired with each of them in turn.
+    """
+    if not len(groups):
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+
+    starts = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]])
+    sizes = np.diff(np.r_[starts, len(groups)])
+    group_of = np.repeat(np.arange(len(starts)), sizes)
+
+    per_index = sizes[group_of]
+    left = np.repeat(np.arange(len(groups)), per_index)
+    position = np.arange(len(left)) - np.repeat(np.cumsum(per_index) - per_index, per_index)
+    right = starts[group_of[left]] + position
+
+    distinct = left != right
+    return left[distinct], right[distinct]
+
+def category_iccs(store: ScoreStore) -> dict[Category, tuple[int, int, float]]:
+    """
+    Per category: contestants, evaluations and the one-way intraclass
+    correlation ICC(1) of total scores, i.e. the share of their variance that
+    is between contestants rather than between judges of the same contestant.
+    Contestants see different judges, hence one-way; group sizes may differ,
+    hence the adjusted size k0. NaN with fewer than 2 contestants or no repeats.
+    Evaluations missing a criterion are left out.
+    """
+    totals = store.scores.sum(axis=1)
+    complete = ~np.isnan(totals)
+    totals = totals[complete]
+    cs = store.column('contestant')[complete]
+    cats = store.column('category')[complete]
+
+    n_contestants = len(store.items['contestant'])
+    n_cats = len(store.items['category'])
+
+    # Per contestant, then per category through each contestant's category
+    n_i = np.bincount(cs, minlength=n_contestants)
+    sum_i = np.bincount(cs, totals, n_contestants)
+    cat_of = np.zeros(n_contestants, dtype=np.intp)
+    cat_of[cs] = cats
+    seen = n_i > 0
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean_i = sum_i / n_i
+
+        n = np.bincount(cats, minlength=n_cats)
+        k = np.bincount(cat_of[seen], minlength=n_cats)
+        grand = np.bincount(cats, totals, n_cats) / n
+
+        ssb = np.bincount(cat_of[seen], n_i[seen] * ((mean_i[seen] - grand[cat_of[seen]]) ** 2), n_cats)
+        ssw = np.bincount(cats, (totals - mean_i[cs]) ** 2, n_cats)
+        sum_n2 = np.bincount(cat_of[seen], n_i[seen] ** 2, n_cats)
+
+        msb = ssb / (k - 1)
+        msw = ssw / (n - k)
+        k0 = (n - (sum_n2 / n)) / (k - 1)
+        icc = (msb - msw) / (msb + ((k0 - 1) * msw))
+        icc[(k < 2) | (n <= k)] = np.nan
+
+    return {
+        cat: (int(k[code]), int(n[code]), float(icc[code]))
+        for (code, cat) in enumerate(store.items['category'])
+    }
@@ -0,0 +1,238 @@
+"""
+Several concours at once (e.g. every region on finals weekend): each pair of
+inputs found under a directory is parsed and reported on (and scheduled, if
+asked) in its own worker process, then the results are merged into one
+provincial summary.
+
+A concours is any directory holding concours.xlsx (or a plain-text concours/
+directory) and, optionally, evaluations.xlsx, .csv or .jsonl (see
+input/readme.md); it is named by its path from the root, e.g. east/ottawa.
+Its outputs go to output/batch/<name>/, as main.py would write them.
+
+A concours that fails (bad inputs, no valid schedule) is reported as such
+and does not stop the others; even a worker dying only loses its own
+concours, as each concours has a process of its own. Only plain values come
+back from the workers: timings, counts and the summary tables, never the
+model. The summary, in output/batch/summary/:
+
+    concours            each concours: status, error, counts and seconds per stage
+    places              every region's places, by category
+    provincial_places   every region's places ranked together, by category
+    categories          every region's categories
+    schools_received    every region's schools
+"""
+
+from __future__ import annotations
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concours import *
+from textparser import write_rows, SUFFIX_CSV, SUFFIX_JSONL
+import os
+import time
+import traceback
+
+PATH_BASE = Path('./src')
+PATH_BATCH = PATH_BASE / 'output' / 'batch'
+
+CONCOURS_NAMES = ('concours.xlsx', 'concours')
+EVALUATIONS_NAMES = ('evaluations.xlsx', 'evaluations.csv', 'evaluations.jsonl')
+
+STAGES = ('parse', 'schedule', 'report', 'save', 'school_reports')
+COUNTS = ('schools', 'categories', 'contestants', 'judges', 'evaluations')
+
+# Report tables (see ConcoursReport.tables) merged into the summary
+SUMMARY_TABLES = ('places', 'categories', 'schools_received')
+
+SUMMARY_FIELDS = ('concours', 'status', 'error', *COUNTS, *(f'{stage}_s' for stage in STAGES), 'total_s')
+PROVINCIAL_PLACES_FIELDS = ('category', 'place', 'contestant', 'concours', 'regional_place', 'average')
+
+class BatchJob:
+    name: str
+    concours_path: Path
+    evaluations_path: Path
+    directory: Path
+    schedule: bool
+
+    def __init__(self: BatchJob, name: str, concours_path: Path, evaluations_path: Path|None, directory: Path,
+                 schedule: bool=False):
+        self.name = name
+        self.concours_path, self.evaluations_path = concours_path, evaluations_path
+        self.directory = directory
+        self.schedule = schedule
+
+    def __repr__(self: BatchJob) -> str:
+        return f'BatchJob: {self.name}'
+
+class BatchResult:
+    name: str
+    error: str|None
+    seconds: dict[str, float] # By stage
+    counts: dict[str, int]
+    tables: dict[str, tuple[tuple[str], list[tuple]]]
+
+    def __init__(self: BatchResult, name: str):
+        self.name = name
+        self.error = None
+        self.seconds = {}
+        self.counts = {}
+        self.tables = {}
+
+    def status(self: BatchResult) -> str:
+        return 'failed' if self.error else 'ok'
+
+    def summary_row(self: BatchResult) -> tuple:
+        seconds = [round(self.seconds[stage], 3) if stage in self.seconds else None for stage in STAGES]
+        return (
+            self.name, self.status(), self.error and self.error.strip().splitlines()[-1],
+            *(self.counts.get(key) for key in COUNTS), *seconds, round(sum(self.seconds.values()), 3)
+        )
+
+def discover(root: Path, directory: Path=PATH_BATCH, schedule: bool=False) -> list[BatchJob]:
+    """Every concours under root (root itself included), by name."""
+    jobs = []
+
+    for (path, dirnames, _) in os.walk(root):
+        path = Path(path)
+        concours_path = next((path / name for name in CONCOURS_NAMES if (path / name).exists()), None)
+        if not concours_path:
+            continue
+
+        # A plain-text concours directory is an input, not another concours
+        if concours_path.is_dir():
+            dirnames.remove(concours_path.name)
+
+        evaluations_path = next((path / name for name in EVALUATIONS_NAMES if (path / name).exists()), None)
+        name = path.relative_to(root).as_posix() if path != root else root.name
+        jobs.append(BatchJob(name, concours_path, evaluations_path, directory / name, schedule))
+
+    return sorted(jobs, key=lambda job: job.name)
+
+def run_job(job: BatchJob) -> BatchResult:
+    """
+    Parse, schedule, report and save one concours; never raises. Module-level
+    so worker processes can run it. Everything in it runs in this process,
+    one step after the other, since the concours themselves run in parallel.
+    """
+    result = BatchResult(job.name)
+
+    def timed(stage: str, f: callable, *args, **kwargs) -> object:
+        start = time.perf_counter()
+        try:
+            return f(*args, **kwargs)
+        finally:
+            result.seconds[stage] = time.perf_counter() - start
+
+    try:
+        # Here, so that importing batch (e.g. to discover) stays cheap
+        from parsecache import load_concours
+        from evaluations import ConcoursReport
+
+        job.directory.mkdir(parents=True, exist_ok=True)
+
+        c = timed('parse', load_concours, job.concours_path, job.evaluations_path, concurrent=False)
+        result.counts = {
+            'schools': len(c.schools),
+            'categories': len(c.categories),
+            'contestants': len(c.contestants),
+            'judges': len(set((j.name, j.school) for j in c.judges)),
+            'evaluations': len(c.scoreboard.evaluations) if c.scoreboard else 0,
+        }
+
+        if job.schedule:
+            timed('schedule', schedule_job, job, c)
+
+        if c.scoreboard:
+            report = timed('report', ConcoursReport, c)
+            timed('save', report.save, job.directory)
+            timed('school_reports', report.save_school_reports, job.directory / 'schools', workers=1)
+
+            tables = report.tables()
+            result.tables = {key: (tables[key][0], list(tables[key][1])) for key in SUMMARY_TABLES}
+
+    except Exception:
+        result.error = traceback.format_exc()
+
+    return result
+
+def schedule_job(job: BatchJob, c: Concours):
+    from schedule import ConcoursScheduler
+    from schedulereport import ScheduleReport
+
+    sched = ConcoursScheduler.create_valid_schedule(c)
+    if not sched:
+        raise ValueError('Could not create a valid schedule')
+
+    ScheduleReport(sched).save(job.directory)
+
+def run_isolated(job: BatchJob) -> BatchResult:
+    """
+    run_job in a process of its own. A process that dies (e.g. out of memory)
+    breaks its whole pool, so sharing one would lose every concours not yet
+    done; this way only this one is lost.
+    """
+    with ProcessPoolExecutor(max_workers=1) as pool:
+        try:
+            return pool.submit(run_job, job).result()
+        except Exception:
+            result = BatchResult(job.name)
+            result.error = traceback.format_exc()
+            return result
+
+def run_batch(jobs: list[BatchJob], workers: int=None) -> list[BatchResult]:
+    """Results in the order of jobs, printed as each finishes; workers concours at a time."""
+    workers = min(workers or os.cpu_count() or 1, len(jobs))
+    results = {}
+
+    # The threads only wait on the processes
+    with ThreadPoolExecutor(max_workers=workers) as threads:
+        futures = {threads.submit(run_isolated, job): job for job in jobs}
+
+        for future in as_completed(futures):
+            job = futures[future]
+            results[job.name] = result = future.result()
+            print(f'{job.name}: {result.status()} in {sum(result.seconds.values()):.2f}s ({len(results)}/{len(jobs)})')
+
+    return [results[job.name] for job in jobs]
+
+def summary_tables(results: list[BatchResult]) -> dict[str, tuple[tuple[str], list[tuple]]]:
+    """The summary's tables, by name: see the top of this file."""
+    tables = {'concours': (SUMMARY_FIELDS, [result.summary_row() for result in results])}
+
+    for key in SUMMARY_TABLES:
+        fields, rows = None, []
+        for result in results:
+            if key in result.tables:
+                fields = result.tables[key][0]
+                rows += [(result.name, *row) for row in result.tables[key][1]]
+
+        if fields:
+            tables[key] = (('concours', *fields), rows)
+
+    if 'places' in tables:
+        tables['provincial_places'] = (PROVINCIAL_PLACES_FIELDS, provincial_places(tables['places'][1]))
+
+    return tables
+
+def provincial_places(rows: list[tuple]) -> list[tuple]:
+    """(concours, category, place, contestant, average) rows, ranked by average across concours."""
+    by_category = {}
+    for (concours, category, place, contestant, average) in rows:
+        by_category.setdefault(category, []).append((concours, place, contestant, average))
+
+    places = []
+    for category in by_category:
+        ranked = sorted(by_category[category], key=lambda row: (row[3] is None, -(row[3] or 0), row[0], row[1]))
+        for (i, (concours, place, contestant, average)) in enumerate(ranked):
+            places.append((category, i + 1, contestant, concours, place, average))
+
+    return places
+
+def write_summary(results: list[BatchResult], directory: Path=PATH_BATCH / 'summary', suffix: str=SUFFIX_CSV):
+    if suffix not in (SUFFIX_CSV, SUFFIX_JSONL):
+        raise ValueError(f'Cannot write the summary as {suffix}')
+
+    directory.mkdir(parents=True, exist_ok=True)
+    for (key, (fields, rows)) in summary_tables(results).items():
+        write_rows(directory / f'{key}{suffix}', fields, rows)
+
+    return directory
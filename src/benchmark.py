@@ -0,0 +1,238 @@
+"""
+End-to-end benchmark: synthetic inputs (see synthetic.py) at a set scale, run
+through each stage of the pipeline, and compared with a stored baseline, so
+that a slowdown shows up before the season rather than during it.
+
+    python src/benchmark.py                        run, compare with the baseline
+    python src/benchmark.py --save-baseline        run, and keep this as the baseline
+    python src/benchmark.py --scale large --repeat 5 --sections
+
+Each stage's wall and CPU times are the best of the repeats; its peak memory
+(traced Python allocations, above what was allocated before it) comes from one
+more run, with tracemalloc on, so that tracing does not slow the timed runs.
+Work done in worker processes (school reports) is timed but not traced.
+
+Results are written to output/benchmark/latest.json; baselines, one per scale,
+to output/benchmark/baseline.json. Baselines only mean something on the
+machine they were made on.
+"""
+
+from __future__ import annotations
+from pathlib import Path
+from concours import *
+from parser import ConcoursParser, ScoreboardParser
+from evaluations import ConcoursReport
+from synthetic import SyntheticConcours
+from textparser import SUFFIX_CSV
+import argparse
+import datetime
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+PATH_BASE = Path('./src')
+PATH_BENCHMARK = PATH_BASE / 'output' / 'benchmark'
+PATH_BASELINE = PATH_BENCHMARK / 'baseline.json'
+PATH_LATEST = PATH_BENCHMARK / 'latest.json'
+
+# Arguments of SyntheticConcours
+SCALES = {
+    'small': {'schools': 12},
+    'medium': {'schools': 60},
+    'large': {'schools': 150, 'judges_per_school': 3},
+    'provincial': {'schools': 600, 'contestants_per_school': 16, 'judges_per_school': 3, 'periods': 4, 'rooms': 24},
+}
+SCALE = 'medium'
+REPEAT = 3
+
+TOLERANCE = 0.2 # Slower (or bigger) than the baseline by more than this is a regression
+MIN_DIFFERENCE_S = 0.02 # Below which a difference in time is noise
+MIN_DIFFERENCE_MB = 1.0 # Likewise for memory
+
+MB = 1024 * 1024
+
+# In order; each is a method of Benchmark working on what the previous ones left
+STAGES = (
+    'read_concours', 'build_concours', 'read_evaluations', 'link_evaluations',
+    'create_report', 'save', 'school_reports', 'export',
+)
+
+class Benchmark:
+    scale: str
+    sections: bool
+
+    directory: Path
+    concours_path: Path
+    evaluations_path: Path
+
+    sheets: dict[str, list[tuple]]
+    rows: list[tuple]
+    c: Concours
+    report: ConcoursReport
+
+    def __init__(self: Benchmark, scale: str=SCALE, sections: bool=False):
+        """sections: also the severity, agreement and bootstrap sections of the report."""
+        self.scale = scale
+        self.sections = sections
+
+    def run(self: Benchmark, repeat: int=REPEAT) -> dict:
+        params = SCALES[self.scale]
+
+        with tempfile.TemporaryDirectory() as directory:
+            self.directory = Path(directory)
+            self.concours_path = self.directory / 'concours.xlsx'
+            self.evaluations_path = self.directory / 'evaluations.xlsx'
+            SyntheticConcours(**params).write(self.concours_path, self.evaluations_path)
+
+            times = [self.run_once() for _ in range(repeat)]
+            peaks = self.run_once(trace=True)
+
+        result = {
+            'scale': self.scale,
+            'params': params,
+            'sections': self.sections,
+            'evaluations': len(self.c.scoreboard.evaluations),
+            'repeat': repeat,
+            'date': datetime.datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'cpus': os.cpu_count(),
+            'stages': {
+                name: {
+                    'wall_s': round(min(t[name][0] for t in times), 4),
+                    'cpu_s': round(min(t[name][1] for t in times), 4),
+                    'peak_mb': round(peaks[name][2] / MB, 2),
+                }
+                for name in STAGES
+            },
+        }
+
+        result['total_s'] = round(sum(stage['wall_s'] for stage in result['stages'].values()), 4)
+        return result
+
+    def run_once(self: Benchmark, trace: bool=False) -> dict[str, tuple[float, float, int]]:
+        """(wall, cpu, peak memory) by stage; peak memory only if traced."""
+        if trace:
+            tracemalloc.start()
+
+        measures = {}
+        try:
+            for name in STAGES:
+                before = 0
+                if trace:
+                    before = tracemalloc.get_traced_memory()[0]
+                    tracemalloc.reset_peak()
+
+                start_wall, start_cpu = time.perf_counter(), time.process_time()
+                getattr(self, name)()
+                wall, cpu = time.perf_counter() - start_wall, time.process_time() - start_cpu
+
+                peak = tracemalloc.get_traced_memory()[1] - before if trace else 0
+                measures[name] = (wall, cpu, peak)
+        finally:
+            if trace:
+                tracemalloc.stop()
+
+        return measures
+
+    def read_concours(self: Benchmark):
+        self.sheets = ConcoursParser.read(self.concours_path)
+
+    def build_concours(self: Benchmark):
+        self.c = ConcoursParser.build(self.concours_path.stem, self.sheets)
+
+    def read_evaluations(self: Benchmark):
+        self.rows = ScoreboardParser.read(self.evaluations_path)
+
+    def link_evaluations(self: Benchmark):
+        ScoreboardParser.link(self.evaluations_path.stem, self.rows, self.c)
+
+    def create_report(self: Benchmark):
+        self.report = ConcoursReport(self.c, severity=self.sections, agreement=self.sections, bootstrap=self.sections)
+
+    def save(self: Benchmark):
+        self.report.save(self.directory)
+
+    def school_reports(self: Benchmark):
+        self.report.save_school_reports(self.directory / 'schools')
+
+    def export(self: Benchmark):
+        self.report.export(SUFFIX_CSV, self.directory / 'export')
+
+def compare(result: dict, baseline: dict, tolerance: float=TOLERANCE) -> list[str]:
+    """Print the result against the baseline; returns the regressions, as messages."""
+    print(f'{"Stage":<20} {"Wall (s)":>9} {"Base (s)":>9} {"Ratio":>6} {"Peak (MB)":>10} {"Base (MB)":>10}')
+
+    regressions = []
+    for (name, stage) in result['stages'].items():
+        base = baseline['stages'].get(name) if baseline else None
+        if not base:
+            print(f'{name:<20} {stage["wall_s"]:>9.3f} {"":>9} {"":>6} {stage["peak_mb"]:>10.1f}')
+            continue
+
+        ratio = stage['wall_s'] / base['wall_s'] if base['wall_s'] else 1
+        print(f'{name:<20} {stage["wall_s"]:>9.3f} {base["wall_s"]:>9.3f} {ratio:>6.2f} {stage["peak_mb"]:>10.1f} {base["peak_mb"]:>10.1f}')
+
+        if ratio > 1 + tolerance and stage['wall_s'] - base['wall_s'] > MIN_DIFFERENCE_S:
+            regressions.append(f'{name}: {stage["wall_s"]:.3f}s, was {base["wall_s"]:.3f}s')
+
+        if (stage['peak_mb'] > base['peak_mb'] * (1 + tolerance)
+                and stage['peak_mb'] - base['peak_mb'] > MIN_DIFFERENCE_MB):
+            regressions.append(f'{name}: {stage["peak_mb"]:.1f} MB, was {base["peak_mb"]:.1f} MB')
+
+    return regressions
+
+def load_baselines(path: Path=PATH_BASELINE) -> dict[str, dict]:
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+def write_json(path: Path, d: dict):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(d, f, indent=2)
+
+def main(argv: list[str]=None) -> int:
+    args = argparse.ArgumentParser(description='Time each stage of the pipeline on synthetic inputs.')
+    args.add_argument('--scale', choices=SCALES, default=SCALE)
+    args.add_argument('--repeat', type=int, default=REPEAT, help='timed runs; the best is kept')
+    args.add_argument('--sections', action='store_true', help='also severity, agreement and bootstrap')
+    args.add_argument('--tolerance', type=float, default=TOLERANCE)
+    args.add_argument('--save-baseline', action='store_true')
+    args = args.parse_args(argv)
+
+    result = Benchmark(args.scale, args.sections).run(args.repeat)
+    write_json(PATH_LATEST, result)
+
+    baselines = load_baselines()
+    baseline = baselines.get(args.scale)
+    if baseline and baseline['sections'] != result['sections']:
+        print(f'The {args.scale} baseline was run {"with" if baseline["sections"] else "without"} --sections; not compared.')
+        baseline = None
+
+    regressions = compare(result, baseline, args.tolerance)
+    print(f'Total {result["total_s"]:.3f}s' + (f', was {baseline["total_s"]:.3f}s' if baseline else ''))
+
+    if args.save_baseline:
+        baselines[args.scale] = result
+        write_json(PATH_BASELINE, baselines)
+        print(f'Baseline saved to {PATH_BASELINE}')
+        return 0
+
+    if not baseline:
+        print('No baseline to compare with; make one with --save-baseline.')
+        return 0
+
+    for regression in regressions:
+        print(f'Regression: {regression}')
+
+    return 1 if regressions else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
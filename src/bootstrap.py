@@ -0,0 +1,135 @@
+"""
+How sure are the places? Each contestant's evaluations are resampled with
+replacement, thousands of times, and the category re-placed every time: the
+spread of their average gives an interval, and how often they land in each
+place gives the probability of that place.
+
+Each category's totals are laid out once in a preallocated contestant x
+evaluation matrix (padded with NaN), so a batch of resamples is one random
+index array and one gather, never a Python object per resample. Batches are
+seeded from the category, not from their order, so results only depend on
+the seed, and may run in worker processes.
+"""
+
+from __future__ import annotations
+from typing import Iterable
+from concurrent.futures import ProcessPoolExecutor
+from scorestore import *
+import numpy as np
+import os
+
+RESAMPLES = 10000
+BATCH = 1000 # Resamples per batch (and per job, across processes)
+SEED = 0
+LEVEL = 0.95 # Of the intervals
+
+class Placings:
+    """
+    A category's contestants (those with complete evaluations, by name) and,
+    for each: their average, the interval of their resampled average and the
+    probability of each place (place_probabilities[i, 0] is of 1st).
+    """
+    contestants: list[Contestant]
+    averages: np.ndarray
+    low: np.ndarray
+    high: np.ndarray
+    place_probabilities: np.ndarray
+
+    def __init__(self: Placings, contestants: list[Contestant], averages: np.ndarray, means: np.ndarray):
+        """means holds a row of averages per resample."""
+        self.contestants = contestants
+        self.averages = averages
+
+        n_resamples, n = means.shape
+        tail = 100 * (1 - LEVEL) / 2
+        self.low, self.high = np.percentile(means, (tail, 100 - tail), axis=0)
+
+        # Each resample's places, counted per contestant
+        order = np.argsort(-means, axis=1, kind='stable')
+        places = np.empty_like(order)
+        np.put_along_axis(places, order, np.arange(n)[np.newaxis, :].repeat(n_resamples, axis=0), axis=1)
+
+        codes = (np.arange(n)[np.newaxis, :] * n) + places
+        self.place_probabilities = np.bincount(codes.ravel(), minlength=n * n).reshape(n, n) / max(n_resamples, 1)
+
+    def contestant_to_row(self: Placings) -> dict[Contestant, int]:
+        return {cont: i for (i, cont) in enumerate(self.contestants)}
+
+def category_matrices(store: ScoreStore) -> dict[Category, tuple[list[Contestant], np.ndarray, np.ndarray]]:
+    """
+    Per category: its contestants by name, and their totals as a contestant x
+    evaluation matrix, padded with NaN, with the number of totals of each.
+    Evaluations missing a criterion are left out, as their total is unknown.
+    """
+    totals = store.scores.sum(axis=1)
+    complete = ~np.isnan(totals)
+    rows_by_contestant = store.groups('contestant')
+
+    cat_to_contestants = {}
+    for (cont, rows) in rows_by_contestant.items():
+        rows = rows[complete[rows]]
+        if len(rows):
+            cat_to_contestants.setdefault(cont.category, []).append((cont, totals[rows]))
+
+    matrices = {}
+    for (cat, pairs) in cat_to_contestants.items():
+        pairs.sort(key=lambda pair: pair[0].name)
+        counts = np.array([len(ts) for (_, ts) in pairs])
+
+        matrix = np.full((len(pairs), counts.max()), np.nan)
+        for (i, (_, ts)) in enumerate(pairs):
+            matrix[i, :len(ts)] = ts
+
+        matrices[cat] = ([cont for (cont, _) in pairs], matrix, counts)
+
+    return matrices
+
+def resample_means(matrix: np.ndarray, counts: np.ndarray, n_resamples: int, seed: np.random.SeedSequence) -> np.ndarray:
+    """
+    n_resamples rows of each contestant's average over as many of their own
+    totals, drawn with replacement. Module-level so worker processes can run it.
+    """
+    rng = np.random.default_rng(seed)
+    (n, width) = matrix.shape
+
+    # Draw width indices for everyone, then keep each contestant's first count
+    picks = (rng.random((n_resamples, n, width)) * counts[:, np.newaxis]).astype(np.intp)
+    values = matrix[np.arange(n)[:, np.newaxis], picks]
+    values[:, np.arange(width)[np.newaxis, :] >= counts[:, np.newaxis]] = 0
+
+    return values.sum(axis=2) / counts
+
+def place_categories(store: ScoreStore, cats: Iterable[Category]=None, n_resamples: int=RESAMPLES, seed: int=SEED,
+                     workers: int=1) -> dict[Category, Placings]:
+    """
+    Bootstrap the places of these categories (all by default). With more
+    than one worker, batches run in a process pool; the result is the same.
+    """
+    matrices = category_matrices(store)
+    cats = matrices.keys() if cats is None else [cat for cat in cats if cat in matrices]
+
+    # One job per batch; seeded by category and batch, so independent of workers
+    jobs = []
+    for cat in cats:
+        (_, matrix, counts) = matrices[cat]
+        for (i, start) in enumerate(range(0, n_resamples, BATCH)):
+            batch_seed = np.random.SeedSequence((seed, cat.sort_key(), i))
+            jobs.append((cat, (matrix, counts, min(BATCH, n_resamples - start), batch_seed)))
+
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, os.cpu_count() or 1, len(jobs))) as pool:
+            results = list(pool.map(resample_means, *zip(*(args for (_, args) in jobs))))
+    else:
+        results = [resample_means(*args) for (_, args) in jobs]
+
+    cat_to_means = {}
+    for ((cat, _), means) in zip(jobs, results):
+        cat_to_means.setdefault(cat, []).append(means)
+
+    placings = {}
+    for (cat, means) in cat_to_means.items():
+        (contestants, matrix, counts) = matrices[cat]
+        averages = np.nansum(matrix, axis=1) / counts
+        placings[cat] = Placings(contestants, averages, np.concatenate(means))
+
+    return placings
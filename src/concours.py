@@ -1,5 +1,7 @@
 from __future__ import annotations
 from functools import total_ordering
+import re
+import unicodedata
 
  # Minutes for duration calculation
 TRANSITION_BW_SPEAKERS = 2
@@ -31,6 +33,9 @@ LEVEL_TO_ABBREVIATION = {
     'Francophone': 'F'
 }
 
+# Match typed names ignoring case and accents (e.g. Lefevre for Lefèvre)
+NORMALIZE_NAMES = False
+
 # Accommodating myself...?
 
 INPUT_SFORMAT_TO_FULL = {
@@ -45,6 +50,34 @@ INPUT_LEVEL_TO_FULL = {
     'Fr.'       : 'Francophone'
 }
 
+# Integer positions, for sorting categories without tuple.index
+SFORMAT_TO_ORDER = {sformat: i for (i, sformat) in enumerate(SFORMATS)}
+GRADE_TO_ORDER = {grade: i for (i, grade) in enumerate(GRADES)}
+LEVEL_TO_ORDER = {level: i for (i, level) in enumerate(LEVELS)}
+
+def slot_state(obj: object) -> tuple[None, dict]:
+    """
+    State for __reduce__ of a slotted object: every slot that is set, except
+    the cached (underscored) ones, which __init__ rebuilds from the identity
+    arguments. Hashes must be rebuilt anyway, as str hashes differ per process.
+    """
+    state = {}
+    for cls in type(obj).__mro__:
+        for slot in cls.__dict__.get('__slots__', ()):
+            if not slot.startswith('_') and hasattr(obj, slot):
+                state[slot] = getattr(obj, slot)
+
+    return None, state
+
+def safe_filename(name: str) -> str:
+    """The name with anything but letters, digits, dots and dashes made underscores."""
+    return re.sub(r'[^\w.-]+', '_', name).strip('_')
+
+def normalize_name(name: str) -> str:
+    decomposed = unicodedata.normalize('NFKD', name)
+    stripped = ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return ' '.join(stripped.casefold().split())
+
 class Concours:
     name: str
     periods: set[Period]
@@ -55,6 +88,12 @@ class Concours:
     target_rs_duration: int
     scoreboard: Scoreboard
 
+    judge_index: dict[str, Judge]
+    judge_last_name_index: dict[str, Judge]
+    ambiguous_last_names: set[str]
+    contestant_index: dict[str, Contestant]
+    category_index: dict[str, Category]
+
     def __init__(self: Concours, name: str):
         self.name = name
         self.periods = set()
@@ -74,35 +113,119 @@ class Concours:
         # Not used yet
         self.scoreboard = None
 
+        # To be filled in by build_indexes
+        self.judge_index = {}
+        self.judge_last_name_index = {}
+        self.ambiguous_last_names = set()
+        self.contestant_index = {}
+        self.category_index = {}
+
     def __repr__(self: Concours) -> str:
         return f'Concours: {self.name}'
     
     def __hash__(self: Concours) -> int:
         return hash(('Concours', self.name))
+
+    def __reduce__(self: Concours) -> tuple:
+        return Concours, (self.name,), self.__dict__
             
-    def get_judge(self: Concours, name: str) -> Judge:
-        """Last name only for evaluations file... TODO"""
-        name = name.split()[-1]
+    def name_key(self: Concours, name: str) -> str:
+        name = str(name or '')
+        return normalize_name(name) if NORMALIZE_NAMES else ' '.join(name.split())
+
+    def build_indexes(self: Concours):
+        """
+        Build the name lookups once everyone has been added (i.e. by the parser).
+        The last name index only holds unambiguous last names; the rest are
+        remembered so that lookups can say why they failed.
+        """
+        self.judge_index = {}
+        self.judge_last_name_index = {}
+        self.ambiguous_last_names = set()
+        self.contestant_index = {}
+        self.category_index = {}
+
         for judge in self.judges:
-            if judge.name.split()[-1] == name:
-                return judge
-        
-        print(f'Could not find judge {name}')
-    
-    def get_contestant(self: Concours, name: str) -> Contestant:
+            key = self.name_key(judge.name)
+            self.judge_index.setdefault(key, judge)
+
+            # Judges are repeated per period; only a different person is ambiguous
+            last = key.split()[-1]
+            other = self.judge_last_name_index.setdefault(last, judge)
+            if other != judge:
+                self.ambiguous_last_names.add(last)
+
+        for last in self.ambiguous_last_names:
+            del self.judge_last_name_index[last]
+
         for contestant in self.contestants:
-            if contestant.name == name:
-                return contestant
-        
-        print(f'Could not find contestant {name}')
-    
-    def get_category(self: Concours, shortname: str) -> Contestant:
+            key = self.name_key(contestant.name)
+            other = self.contestant_index.setdefault(key, contestant)
+            if other != contestant:
+                print(f'Duplicate contestant name {contestant.name} ({other.school.name}, {contestant.school.name})')
+
         for cat in self.categories:
-            if cat.shortname() == shortname:
-                return cat
-        
+            self.category_index[cat.shortname()] = cat
+
+    def get_judge(self: Concours, name: str) -> Judge:
+        """Full name if it matches, otherwise last name only (as in the evaluations file)."""
+        key = self.name_key(name)
+        if key in self.judge_index:
+            return self.judge_index[key]
+
+        last = key.split()[-1] if key else ''
+        if last in self.judge_last_name_index:
+            return self.judge_last_name_index[last]
+
+        if last in self.ambiguous_last_names:
+            print(f'Ambiguous judge {name}: several judges share that last name')
+        else:
+            print(f'Could not find judge {name}')
+
+    def get_contestant(self: Concours, name: str) -> Contestant:
+        key = self.name_key(name)
+        if key in self.contestant_index:
+            return self.contestant_index[key]
+
+        print(f'Could not find contestant {name}')
+
+    def get_category(self: Concours, shortname: str) -> Category:
+        if shortname in self.category_index:
+            return self.category_index[shortname]
+
         print(f'Could not find category {shortname}')
-    
+
+    def problems(self: Concours) -> list[str]:
+        """What a human should look at before trusting the results, if anything."""
+        problems = []
+
+        for cat in sorted(self.categories):
+            if not cat.contestants:
+                problems.append(f'No contestants in {cat.shortname()}')
+
+        if not self.scoreboard:
+            return problems
+
+        evaluated = set()
+        for e in sorted(self.scoreboard.evaluations, key=lambda e: (e.contestant.name, e.judge.name if e.judge else '')):
+            evaluated.add(e.contestant)
+            where = f'{e.contestant.name} ({e.category.shortname()})'
+
+            if e.judge is None:
+                problems.append(f'Unknown or ambiguous judge for {where}; left out of the report')
+            elif e.judge.school == e.contestant.school:
+                problems.append(f'{e.judge.name} judged {where}, from their own school')
+
+            if e.scores is None:
+                problems.append(f'No scores for {where} from {e.judge.name if e.judge else "?"}')
+            elif None in e.scores:
+                problems.append(f'Missing scores for {where} from {e.judge.name if e.judge else "?"}')
+
+        for cont in sorted(self.contestants - evaluated, key=lambda cont: cont.name):
+            problems.append(f'No evaluations for {cont.name} ({cont.category.shortname()})')
+
+        return problems
+
     def projected_duration(self: Concours) -> int:
         return sum(c.projected_duration() for c in self.categories)
     
@@ -118,13 +241,22 @@ class Category:
     base_duration: int
     contestants: set[Contestant]
 
+    # Categories are hashed, compared and sorted constantly (every set of them
+    # in the scheduler and report), so their identity is computed once
+    __slots__ = ('sformat', 'grade', 'level', 'base_duration', 'contestants', '_name', '_shortname', '_sort_key', '_hash')
+
     def __init__(self: Category, sformat: str, grade: str, level: str, base_duration: int):
         self.sformat, self.grade, self.level = sformat, grade, level
         self.base_duration = base_duration
         self.contestants = set()
 
+        self._name = f' {sformat} {grade} {level}'
+        self._shortname = f'{SFORMAT_TO_ABBREVIATION[sformat]}{GRADE_TO_ABBREVIATION[grade]}{LEVEL_TO_ABBREVIATION[level]}'
+        self._sort_key = (((SFORMAT_TO_ORDER[sformat] * len(GRADES)) + GRADE_TO_ORDER[grade]) * len(LEVELS)) + LEVEL_TO_ORDER[level]
+        self._hash = hash(('Cat', self._shortname))
+
     def name(self: Category) -> str:
-        return f' {self.sformat} {self.grade} {self.level}'
+        return self._name
     
     def projected_duration(self: Category) -> int:
         return max(0, ((self.base_duration + TRANSITION_BW_SPEAKERS) * len(self.contestants)) - TRANSITION_BW_SPEAKERS)
@@ -143,7 +275,7 @@ class Category:
         return set(filter(lambda j: j.school not in schools, judges))
 
     def shortname(self: Category) -> str:
-        return f'{SFORMAT_TO_ABBREVIATION[self.sformat]}{GRADE_TO_ABBREVIATION[self.grade]}{LEVEL_TO_ABBREVIATION[self.level]}'
+        return self._shortname
 
     def terms(self: Category) -> tuple[str]:
         return self.sformat, self.grade, self.level
@@ -154,26 +286,34 @@ class Category:
         # Cadre, Intensif, Immersion, Francophone
 
         return (
-            SFORMATS.index(self.sformat),
-            GRADES.index(self.grade),
-            LEVELS.index(self.level),
+            SFORMAT_TO_ORDER[self.sformat],
+            GRADE_TO_ORDER[self.grade],
+            LEVEL_TO_ORDER[self.level],
         )
 
+    def sort_key(self: Category) -> int:
+        """sort_terms as a single integer."""
+        return self._sort_key
+
     def __repr__(self: Category) -> str:
         # return f'Cat: {self.name()}'
         return f'{self.shortname()}'
     
     def __eq__(self: Category, other: object) -> bool:
-        return isinstance(other, Category) and (self.name() == other.name())
+        return isinstance(other, Category) and (self._name == other._name)
     
     def __lt__(self: Category, other: Category) -> bool:
         if not (isinstance(other, Category)):
             return False
 
-        return self.sort_terms() < other.sort_terms()
+        return self._sort_key < other._sort_key
 
     def __hash__(self: Category) -> int:
-        return hash(('Cat', self.shortname()))
+        return self._hash
+
+    def __reduce__(self: Category) -> tuple:
+        # Identity as constructor args so that unpickled sets can hash us mid-cycle
+        return Category, (self.sformat, self.grade, self.level, self.base_duration), slot_state(self)
 
 class School:
     name: str
@@ -181,12 +321,16 @@ class School:
     judges: set[Judge]
     contestants: set[Contestant]
 
+    __slots__ = ('name', 'shortname', 'judges', 'contestants', '_hash')
+
     def __init__(self: School, name: str, shortname: str):
         self.name = name
         self.shortname = shortname
         self.judges = set()
         self.contestants = set()
 
+        self._hash = hash(('School', name))
+
     def __repr__(self: School) -> str:
         return f'School: {self.name}'
     
@@ -194,13 +338,20 @@ class School:
         return isinstance(other, School) and (self.name == other.name)
 
     def __hash__(self: School) -> int:
-        return hash(('School', self.name))
+        return self._hash
+
+    def __reduce__(self: School) -> tuple:
+        return School, (self.name, self.shortname), slot_state(self)
 
 class Person:
     name: str
 
+    # Subclasses set _hash from their own identity
+    __slots__ = ('name', '_hash')
+
     def __init__(self: Person, name: str):
         self.name = name
+        self._hash = hash(('Person', name))
 
     def __repr__(self: Person) -> str:
         # return f'Person: {self.name}'
@@ -210,14 +361,19 @@ class Person:
         return isinstance(other, Person) and (self.name == other.name)
 
     def __hash__(self: Person) -> int:
-        return hash(('Person', self.name))
+        return self._hash
+
+    def __reduce__(self: Person) -> tuple:
+        return type(self), (self.name,), slot_state(self)
 
 class Volunteer(Person):
-    pass
+    __slots__ = ()
 
 class SchoolPerson(Person):
     school: School
 
+    __slots__ = ('school',)
+
     def __init__(self: SchoolPerson, name: str, school: School):
         super().__init__(name)
         self.school = school
@@ -225,13 +381,19 @@ class SchoolPerson(Person):
     def __eq__(self: SchoolPerson, other: object) -> bool:
         return isinstance(other, SchoolPerson) and (self.name == other.name) and (self.school == other.school)
 
+    def __reduce__(self: SchoolPerson) -> tuple:
+        return type(self), (self.name, self.school), slot_state(self)
+
 class Judge(SchoolPerson):
     # TODO This period stuff is definitely not ideal. See evaluations hackishness too.
     period: Period # Because a judge can be in different places in each period.
 
+    __slots__ = ('period',)
+
     def __init__(self: Judge, name: str, school: School, period: Period):
         super().__init__(name, school)
         self.period = period
+        self._hash = hash(('Judge', name, period))
     
     def eligible_for_contestant(self: Judge, contestant: Contestant) -> bool:
         return self.school != contestant.school
@@ -247,14 +409,20 @@ class Judge(SchoolPerson):
         return isinstance(other, Judge) and ((self.name, self.school) == (other.name, other.school))
 
     def __hash__(self: Judge) -> int:
-        return hash(('Judge', self.name, self.period))
+        return self._hash
+
+    def __reduce__(self: Judge) -> tuple:
+        return Judge, (self.name, self.school, self.period), slot_state(self)
 
 class Contestant(SchoolPerson):
     category: Category
 
+    __slots__ = ('category',)
+
     def __init__(self: Contestant, name: str, school: School, category: Category):
         super().__init__(name, school)
         self.category = category
+        self._hash = hash(('Contestant', school, category, name))
     
     def eligible_for_judge(self: SchoolPerson, judge: Judge) -> bool:
         return self.school != judge.school
@@ -265,15 +433,21 @@ class Contestant(SchoolPerson):
         return self.name
 
     def __hash__(self: Contestant) -> int:
-        return hash(('Contestant', self.school, self.category, self.name))
+        return self._hash
+
+    def __reduce__(self: Contestant) -> tuple:
+        return Contestant, (self.name, self.school, self.category), slot_state(self)
 
 class Period:
     name: str
     rooms: set[Room]
 
+    __slots__ = ('name', 'rooms', '_hash')
+
     def __init__(self: Period, name: str):
         self.name = name
         self.rooms = set()
+        self._hash = hash(('Period', name))
 
     def __repr__(self: Period) -> str:
         # return f'Period: {self.name}'
@@ -283,22 +457,31 @@ class Period:
         return isinstance(other, Period) and (other.name == self.name)
 
     def __hash__(self: Period) -> int:
-        return hash(('Period', self.name))
+        return self._hash
+
+    def __reduce__(self: Period) -> tuple:
+        return Period, (self.name,), slot_state(self)
 
 class Room:
     name: str
     periods: set[Period]
 
+    __slots__ = ('name', 'periods', '_hash')
+
     def __init__(self: Room, name: str):
         self.name = name
         self.periods = set()
+        self._hash = hash(('Room', name))
 
     def __repr__(self: Room) -> str:
         # return f'Room: {self.name}'
         return f'RM {self.name}'
 
     def __hash__(self: Room) -> int:
-        return hash(('Room', self.name))
+        return self._hash
+
+    def __reduce__(self: Room) -> tuple:
+        return Room, (self.name,), slot_state(self)
 
 # =============================================================================
 # EVALUATIONS
@@ -321,14 +504,33 @@ class Scoreboard:
 
     def __hash__(self: Scoreboard) -> int:
         return hash(('Scoreboard', self.name))
+
+    def __reduce__(self: Scoreboard) -> tuple:
+        return Scoreboard, (self.name,), self.__dict__
+
+    def columns(self: Scoreboard) -> ScoreStore:
+        """
+        The scored evaluations as arrays (see scorestore), less those whose
+        judge could not be found (see unresolved). Imported here so that
+        scheduling does not need numpy.
+        """
+        from scorestore import ScoreStore
+        return ScoreStore.from_evaluations(e for e in self.evaluations if e.scores is not None and e.judge is not None)
+
+    def unresolved(self: Scoreboard) -> list[Evaluation]:
+        """Evaluations whose judge is unknown, or only named by a last name several judges share."""
+        return [e for e in self.evaluations if e.judge is None]
     
 class Speech:
     contestant: Contestant
     duration: int
 
+    __slots__ = ('contestant', 'duration', '_hash')
+
     def __init__(self: Speech, contestant: Contestant):
         self.contestant = contestant
         self.duration = 0
+        self._hash = hash(('Speech', contestant))
     
     def add_duration(self: Speech, duration: int):
         self.duration = duration
@@ -345,23 +547,36 @@ class Speech:
         return f'SP: {self.contestant}'
 
     def __hash__(self: Speech) -> int:
-        return hash(('Speech', self.contestant))
+        return self._hash
+
+    def __reduce__(self: Speech) -> tuple:
+        return Speech, (self.contestant,), slot_state(self)
 
 class TraditionalSpeech(Speech):
     title: str
 
+    __slots__ = ('title',)
+
     def __init__(self: TraditionalSpeech, contestant: Contestant, title: str):
         super().__init__(contestant)
         self.title = title
 
+    def __reduce__(self: TraditionalSpeech) -> tuple:
+        return TraditionalSpeech, (self.contestant, self.title), slot_state(self)
+
 class ImpromptuSpeech(Speech):
     prompt_type: str
     prompt: str
 
+    __slots__ = ('prompt_type', 'prompt')
+
     def __init__(self: ImpromptuSpeech, contestant: Contestant, prompt_type: str, prompt: str):
         super().__init__(contestant)
         self.prompt_type, self.prompt = prompt_type, prompt
 
+    def __reduce__(self: ImpromptuSpeech) -> tuple:
+        return ImpromptuSpeech, (self.contestant, self.prompt_type, self.prompt), slot_state(self)
+
 class Evaluation:
     judge: Judge
     speech: Speech
@@ -375,6 +590,8 @@ class Evaluation:
     grade: str
     level: str
 
+    __slots__ = ('judge', 'speech', 'scores', 'comments', 'contestant', 'category', 'sformat', 'grade', 'level', '_hash')
+
     def __init__(self: Evaluation, judge: Judge, speech: Speech, scores: tuple[float]):
         self.judge = judge
         self.speech = speech
@@ -388,9 +605,14 @@ class Evaluation:
         self.grade = self.category.grade
         self.level = self.category.level
 
+        self._hash = hash(('Evaluation', judge, speech))
+
     def __repr__(self: Evaluation) -> str:
         # return f'Evaluation: {self.name}'
         return f'EV: {self.speech} / {self.judge}'
 
     def __hash__(self: Evaluation) -> int:
-        return hash(('Evaluation', self.judge, self.speech))
+        return self._hash
+
+    def __reduce__(self: Evaluation) -> tuple:
+        return Evaluation, (self.judge, self.speech, self.scores), slot_state(self)
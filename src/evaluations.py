@@ -1,11 +1,26 @@
 from __future__ import annotations
-from typing import Iterable
+from typing import Iterable, Iterator
+from copy import copy
+import importlib.util
+import json
+import os
 
 import openpyxl
 from openpyxl.workbook.workbook import Workbook
-from openpyxl.styles.alignment import Alignment
+from openpyxl.styles import Alignment, Font, NamedStyle
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.worksheet.dimensions import ColumnDimension
+from openpyxl.utils import get_column_letter
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
 from concours import *
+from scorestore import *
+from textparser import write_rows, SUFFIX_CSV, SUFFIX_JSONL
+from severity import SeverityModel
+from agreement import JudgeAgreement, category_iccs
+from bootstrap import Placings, place_categories
+from profiling import phase
+import numpy as np
 
 PATH_BASE = Path('./src')
 PATH_OUTPUT = PATH_BASE / 'output'
@@ -13,7 +28,43 @@ PATH_TEMPLATES = PATH_BASE / 'templates'
 
 PATH_REPORT_TEMPLATE = PATH_TEMPLATES / 'report.xlsx'
 
-PERIOD_ANY = ''
+# Beside the school reports: each school's name and shortname to its file (see main.py school-report)
+SCHOOL_REPORTS_INDEX = 'schools.json'
+
+# Shared styles of the places' scores, and of headers not in the template
+STYLE_SCORE = 'report_score'
+STYLE_HEADER = 'report_header'
+
+# Sheets not in the template, and the template sheet they look like
+SHEET_TEMPLATES = {
+    'contestants_severity': 'contestants',
+    'places_severity': 'places',
+}
+
+SUFFIX_PARQUET = '.parquet'
+EXPORT_SUFFIXES = (SUFFIX_CSV, SUFFIX_JSONL, SUFFIX_PARQUET)
+
+# Columns of the exports, in the order of generic_rows; t and i are the
+# traditional and impromptu criteria
+GENERIC_FIELDS = (
+    'item', 'n', 'total',
+    'n_t', 'total_t', 't1', 't2', 't3', 't4', 't5',
+    'n_i', 'total_i', 'i1', 'i2', 'i3', 'i4', 'i5'
+)
+PLACES_FIELDS = ('category', 'place', 'contestant', 'average')
+AGREEMENT_FIELDS = (
+    'judge_a', 'judge_b', 'shared',
+    'corr1', 'corr2', 'corr3', 'corr4', 'corr5',
+    'mad1', 'mad2', 'mad3', 'mad4', 'mad5'
+)
+ICC_FIELDS = ('category', 'contestants', 'evaluations', 'icc')
+BOOTSTRAP_FIELDS = ('category', 'place', 'contestant', 'average', 'low', 'high', 'p_place', 'p_first', 'p_podium')
+
+# Pairs of judges sharing fewer contestants are left out of the agreement sheet
+AGREEMENT_MIN_SHARED = 2
+
+# Rows per Parquet row group
+EXPORT_BATCH = 4096
 
 SCORE_LABELS = {
     'Traditionnel': (
@@ -35,32 +86,162 @@ SCORE_LABELS = {
 
 # Utilities
 
-def assign_named_cells(ws, cols: str, row: int, values: Iterable, alignment: str=''):
+def ordinal(n: int) -> str:
+    if n % 100 in (11, 12, 13):
+        return f'{n}th'
+
+    return f'{n}{({1: "st", 2: "nd", 3: "rd"}).get(n % 10, "th")}'
+
+def write_parquet(path: Path, fields: tuple[str], rows: Iterable[tuple]):
     """
-    >>> assign_named_cells(ws, 'CDEF', 1, (tuple, of, 4, values))
+    As textparser.write_rows, a row group at a time; column types come from
+    the first. pyarrow is optional, and imported here so that reports without
+    Parquet never pay for it.
     """
-    for (c, v) in zip(cols, values):
-        ws[f'{c}{row}'] = v
+    import pyarrow
+    import pyarrow.parquet
+
+    writer = None
+    rows = iter(rows)
+
+    try:
+        while batch := [row for (_, row) in zip(range(EXPORT_BATCH), rows)]:
+            table = pyarrow.Table.from_pylist([dict(zip(fields, row)) for row in batch])
+            if writer is None:
+                writer = pyarrow.parquet.ParquetWriter(path, table.schema)
+            writer.write_table(table.cast(writer.schema))
 
-        if alignment:
-            ws[f'{c}{row}'].alignment = Alignment(alignment)
+    finally:
+        if writer:
+            writer.close()
 
-def assign_n_cells(ws, start: str, row: int, values: Iterable, alignment: str=''):
+def school_filename(school: School) -> str:
+    """The school's shortname (or name), safe to use as a file name."""
+    return safe_filename(school.shortname or school.name) or 'school'
+
+def school_filenames(schools: Iterable[School]) -> dict[School, str]:
+    """
+    school_filename for each school, made unique: by name, a school whose
+    file name is taken (ignoring case) gets _2, _3 and so on.
     """
-    >>> assign_named_cells(ws, 'C', 1, (tuple, of, values))
+    filenames, taken = {}, set()
+
+    for school in sorted(schools, key=lambda s: s.name):
+        base = filename = school_filename(school)
+        i = 1
+        while filename.casefold() in taken:
+            i += 1
+            filename = f'{base}_{i}'
+
+        taken.add(filename.casefold())
+        filenames[school] = filename
+
+    return filenames
+
+def render_school_report(rows: list[tuple]) -> str:
+    """As printed by school_report: each contestant's total and criteria, adjusted in parentheses."""
+    lines = []
+
+    for (name, labels, score_a, scores_a, score_r, scores_r) in rows:
+        lines.append(name)
+        lines.append(f'Total: {score_a} ({score_r})')
+
+        for i in range(5):
+            lines.append(f'{labels[i]}: {scores_a[i]} ({scores_r[i]})')
+
+        lines.append('')
+
+    return '\n'.join(lines)
+
+def write_school_report(path: Path, rows: list[tuple]) -> Path:
+    """Module-level so worker processes can run it."""
+    path.write_text(render_school_report(rows), encoding='utf-8')
+    return path
 
-    # TODO Simple: does not handle post-Z. Do not supply too many values :)
+class ReportTemplate:
     """
+    What the report keeps from templates/report.xlsx: each sheet's header row
+    and column widths, and the header cells' styles as named styles, shared by
+    every cell that looks the same. Read once, then reused for every save.
+    """
+    sheets: dict[str, tuple[list[tuple[object, str]], list[tuple[int, int, float]]]]
+    styles: dict[str, NamedStyle]
+
+    _looks: dict[tuple, str]
+    _cached: ReportTemplate = None
+
+    def __init__(self: ReportTemplate, path: Path):
+        wb = openpyxl.load_workbook(path)
+        self.sheets = {}
+        self.styles = {}
+        self._looks = {}
+
+        for ws in wb.worksheets:
+            header = [(cell.value, self.style_of(cell)) for cell in ws[1] if cell.value is not None]
+            widths = [(d.min, d.max, d.width) for d in ws.column_dimensions.values() if d.customWidth]
+            self.sheets[ws.title] = (header, widths)
+
+        self.styles[STYLE_SCORE] = NamedStyle(STYLE_SCORE, alignment=Alignment('left'))
+        self.styles[STYLE_HEADER] = NamedStyle(STYLE_HEADER, font=Font(bold=True))
+
+    @staticmethod
+    def load() -> ReportTemplate:
+        if ReportTemplate._cached is None:
+            ReportTemplate._cached = ReportTemplate(PATH_REPORT_TEMPLATE)
+
+        return ReportTemplate._cached
+
+    def style_of(self: ReportTemplate, cell) -> str:
+        """The name of a shared style for this cell's look, added if new."""
+        look = (copy(cell.font), copy(cell.fill), copy(cell.border), copy(cell.alignment), cell.number_format)
+        if look not in self._looks:
+            name = f'report_header_{len(self._looks)}'
+            (font, fill, border, alignment, number_format) = look
+            self.styles[name] = NamedStyle(
+                name, font=font, fill=fill, border=border, alignment=alignment, number_format=number_format
+            )
+            self._looks[look] = name
+
+        return self._looks[look]
+
+    def add_sheet(self: ReportTemplate, wb: Workbook, title: str, n_columns: int=0, fields: tuple[str]=None):
+        """
+        A write-only sheet with the template's widths and header. Columns past
+        the template's repeat its last header's style and width, numbered with
+        ordinals (for places: 11th, 12th...). Sheets the template does not
+        have are headed by fields, in bold.
+        """
+        template_title = SHEET_TEMPLATES.get(title, title)
+        if template_title in self.sheets:
+            header, widths = self.sheets[template_title]
+        else:
+            header, widths = [(field, STYLE_HEADER) for field in fields], []
 
-    for (i, v) in enumerate(values):
-        c = chr(ord(start) + i)
-        ws[f'{c}{row}'] = v
+        ws = wb.create_sheet(title)
 
-        if alignment:
-            ws[f'{c}{row}'].alignment = Alignment(alignment)
+        if n_columns > len(header):
+            style = header[-1][1]
+            header = header + [(ordinal(i), style) for i in range(len(header), n_columns)]
+
+            (lo, hi, width) = widths[-1]
+            widths = widths[:-1] + [(lo, max(hi, n_columns), width)]
+
+        for (lo, hi, width) in widths:
+            letter = get_column_letter(lo)
+            ws.column_dimensions[letter] = ColumnDimension(ws, letter, min=lo, max=hi, width=width)
+
+        ws.append([self.cell(ws, value, style) for (value, style) in header])
+        return ws
+
+    @staticmethod
+    def cell(ws, value: object, style: str) -> WriteOnlyCell:
+        cell = WriteOnlyCell(ws, value)
+        cell.style = style
+        return cell
 
 class ConcoursReport:
     c: Concours
+    store: ScoreStore
 
     judge_to_sp: dict[Judge, Scorepad]
     judge_to_sp_adj: dict[Judge, Scorepad]
@@ -77,8 +258,46 @@ class ConcoursReport:
     school_to_sp_given: dict[School, Scorepad]
     school_to_sp_received: dict[School, Scorepad]
 
-    def __init__(self: ConcoursReport, c: Concours):
+    # Only with severity (see severity.py)
+    severity: SeverityModel|None
+    contestant_to_sp_sev: dict[Contestant, Scorepad]
+    category_to_places_sev: dict[Category, list[Scorepad]]
+
+    # Only with agreement (see agreement.py)
+    agreement: JudgeAgreement|None
+    category_to_icc: dict[Category, tuple[int, int, float]]
+
+    # Only with bootstrap (see bootstrap.py)
+    bootstrap: bool
+    workers: int # Processes to resample in
+    category_to_placings: dict[Category, Placings]
+
+    def __init__(self: ConcoursReport, c: Concours, severity: bool=False, agreement: bool=False, bootstrap: bool=False,
+                 workers: int=1):
+        """
+        With severity, also adjust contestants for their judges' severity, and
+        place them by it. With agreement, also compare judges with each other.
+        With bootstrap, also give each place an interval and a probability,
+        resampling in that many worker processes.
+        """
         self.c = c
+        self.store = c.scoreboard.columns()
+
+        unresolved = c.scoreboard.unresolved()
+        if unresolved:
+            print(f'Left out {len(unresolved)} evaluations whose judge is unknown or ambiguous (see main.py validate)')
+        self.severity = None
+        if severity:
+            with phase('severity'):
+                self.severity = SeverityModel(self.store)
+        self.agreement = None
+        self.category_to_icc = {}
+        self.bootstrap = bootstrap
+        self.workers = workers
+        self.category_to_placings = {}
+
+        if agreement:
+            self.measure_agreement()
 
         self.judge_to_sp = {}
         self.judge_to_sp_adj = {}
@@ -94,60 +313,208 @@ class ConcoursReport:
         self.category_to_places = {}
         self.school_to_sp_given = {}
         self.school_to_sp_received = {}
+        self.contestant_to_sp_sev = {}
+        self.category_to_places_sev = {}
 
-        self.create_scorepads()
+        with phase('create_scorepads'):
+            self.create_scorepads()
     
     def create_scorepads(self: ConcoursReport):
-
-        es = set(filter(lambda e: e.scores != None, self.c.scoreboard.evaluations))
+        store = self.store
+
+        # Every grouping in one pass over the evaluations per key, not one per
+        # item, along with each group's split by format for the sheets
+        key_to_groups = {key: store.groups(key) for key in KEYS}
+        key_to_parts = {key: store.subgroups(key, 'sformat') for key in KEYS}
+        no_rows = np.empty(0, dtype=np.intp)
+
+        def _sp(key: str, item: object) -> Scorepad:
+            parts = key_to_parts[key]
+            by_sformat = {sformat: Scorepad(item, store, parts.get((item, sformat), no_rows)) for sformat in SFORMATS}
+            return Scorepad(item, store, key_to_groups[key].get(item, no_rows), by_sformat=by_sformat)
        
         # Must be done first for adjustment
         for cat in self.c.categories:
-            self.category_to_sp[cat] = Scorepad(cat, set(filter(lambda e: e.category == cat, es)))            
+            self.category_to_sp[cat] = _sp('category', cat)
+
+        cat_avgs = self.category_averages()
 
         # Must precede category places
         for cont in self.c.contestants:
-            sp = Scorepad(cont, set(filter(lambda e: e.speech.contestant == cont, es)))
+            sp = _sp('contestant', cont)
             self.contestant_to_sp[cont] = sp
-            self.contestant_to_sp_adj[cont] = sp.adjust_to_category(self.category_to_sp)
+            self.contestant_to_sp_adj[cont] = sp.adjust_to_category(cat_avgs)
 
         for judge in self.c.judges:
-            # Hackish solution to different periods
-            judge = Judge(judge.name, judge.school, PERIOD_ANY)
+            judge = judge_any_period(judge)
 
-            sp = Scorepad(judge, set(filter(lambda e: e.judge == judge, es)))
+            sp = _sp('judge', judge)
             self.judge_to_sp[judge] = sp
-            self.judge_to_sp_adj[judge] = sp.adjust_to_category(self.category_to_sp)
+            self.judge_to_sp_adj[judge] = sp.adjust_to_category(cat_avgs)
 
         # Places
         for cat in self.c.categories:
-            conts = set(filter(lambda sp: sp.item.category == cat, self.contestant_to_sp.values()))
-            self.category_to_places[cat] = sorted(conts, key=lambda cont: cont.average(), reverse=True)
+            self.place_category(cat)
+
+        if self.severity:
+            self.adjust_to_severity()
+
+        if self.bootstrap:
+            with phase('bootstrap'):
+                self.category_to_placings = place_categories(store, workers=self.workers)
 
         for sformat in SFORMATS:
-            self.sformat_to_sp[sformat] = Scorepad(sformat, set(filter(lambda e: e.sformat == sformat, es)))
+            self.sformat_to_sp[sformat] = _sp('sformat', sformat)
 
         for grade in GRADES:
-            self.grade_to_sp[grade] = Scorepad(grade, set(filter(lambda e: e.grade == grade, es)))
+            self.grade_to_sp[grade] = _sp('grade', grade)
 
         for level in LEVELS:
-            self.level_to_sp[level] = Scorepad(level, set(filter(lambda e: e.level == level, es)))
+            self.level_to_sp[level] = _sp('level', level)
 
-        for e in es:
-            bucket = round(e.speech.duration / 60)
-            self.duration_to_sp.setdefault(bucket, Scorepad(bucket, set())).add_evaluation(e)
+        for bucket in store.items['duration']:
+            self.duration_to_sp[bucket] = _sp('duration', bucket)
         
         for (bucket, sp) in self.duration_to_sp.items():
-            self.duration_to_sp_adj[bucket] = sp.adjust_to_category(self.category_to_sp)
+            self.duration_to_sp_adj[bucket] = sp.adjust_to_category(cat_avgs)
 
         for school in self.c.schools:
-            self.school_to_sp_given[school] = Scorepad(school, set(filter(lambda e: e.judge.school == school, es)))
-            self.school_to_sp_received[school] = Scorepad(school, set(filter(lambda e: e.contestant.school == school, es)))
+            self.school_to_sp_given[school] = _sp('judge_school', school)
+            self.school_to_sp_received[school] = _sp('contestant_school', school)
+
+    def category_averages(self: ConcoursReport) -> np.ndarray:
+        """Each category's averages, as a row per category code in the store."""
+        avgs = [self.category_to_sp[cat].averages() for cat in self.store.items['category']]
+        return np.array(avgs).reshape(-1, N_CRITERIA)
+
+    def place_category(self: ConcoursReport, cat: Category):
+        sps = (self.contestant_to_sp[cont] for cont in cat.contestants)
+        self.category_to_places[cat] = sorted(sps, key=lambda sp: sp.average(), reverse=True)
+
+    def adjust_to_severity(self: ConcoursReport):
+        """Contestants less the fitted severity of each of their judges, and the places that follow."""
+        offsets = self.severity.judge_offsets()
+
+        for (cont, sp) in self.contestant_to_sp.items():
+            self.contestant_to_sp_sev[cont] = sp.adjust_to('judge', offsets)
+
+        for cat in self.c.categories:
+            sps = (self.contestant_to_sp_sev[cont] for cont in cat.contestants)
+            self.category_to_places_sev[cat] = sorted(sps, key=lambda sp: sp.average(), reverse=True)
+
+    def add_evaluations(self: ConcoursReport, es: Iterable[Evaluation]):
+        """
+        Fold new evaluations (already added to the scoreboard) into the report,
+        touching only the scorepads they belong to rather than rebuilding.
+        """
+        store = self.store
+        cats = set()
+
+        for e in es:
+            # As in Scoreboard.columns
+            if e.scores is None or e.judge is None:
+                continue
+
+            row = store.append(e)
+            judge = judge_any_period(e.judge)
+            bucket = duration_bucket(e)
+
+            self.category_to_sp[e.category].add_row(row)
+            self.contestant_to_sp[e.contestant].add_row(row)
+            self.judge_to_sp.setdefault(judge, Scorepad.split(judge, store)).add_row(row)
+            self.sformat_to_sp[e.sformat].add_row(row)
+            self.grade_to_sp[e.grade].add_row(row)
+            self.level_to_sp[e.level].add_row(row)
+            self.duration_to_sp.setdefault(bucket, Scorepad.split(bucket, store)).add_row(row)
+            self.school_to_sp_given[e.judge.school].add_row(row)
+            self.school_to_sp_received[e.contestant.school].add_row(row)
+
+            cats.add(e.category)
+
+        self.readjust_categories(cats)
+        for cat in cats:
+            self.place_category(cat)
+
+        # Every judge's effect depends on every score, so refit (it is fast)
+        if self.severity:
+            self.severity.fit()
+            self.adjust_to_severity()
+
+        if self.agreement:
+            self.measure_agreement()
+
+        if self.bootstrap:
+            self.category_to_placings.update(place_categories(store, cats, workers=self.workers))
+
+    def add_evaluation(self: ConcoursReport, e: Evaluation):
+        self.add_evaluations((e,))
+
+    def measure_agreement(self: ConcoursReport):
+        with phase('agreement'):
+            self.agreement = JudgeAgreement(self.store)
+            self.category_to_icc = category_iccs(self.store)
+
+    def readjust_categories(self: ConcoursReport, cats: set[Category]):
+        """
+        These categories' averages moved, so every adjusted scorepad with an
+        evaluation in them is stale: their contestants, and the judges and
+        duration buckets that saw them.
+        """
+        store = self.store
+        conts, judges, buckets = set(), set(), set()
+
+        for cat in cats:
+            conts |= cat.contestants
+
+            rows = self.category_to_sp[cat].rows
+            judges.update(store.items['judge'][code] for code in np.unique(store.column('judge')[rows]))
+            buckets.update(store.items['duration'][code] for code in np.unique(store.column('duration')[rows]))
+
+        # Views are cheap to remake; the others keep the old averages, which
+        # have not changed for their categories
+        cat_avgs = self.category_averages()
+
+        for cont in conts:
+            self.contestant_to_sp_adj[cont] = self.contestant_to_sp[cont].adjust_to_category(cat_avgs)
+
+        for judge in judges:
+            self.judge_to_sp_adj[judge] = self.judge_to_sp[judge].adjust_to_category(cat_avgs)
+
+        for bucket in buckets:
+            self.duration_to_sp_adj[bucket] = self.duration_to_sp[bucket].adjust_to_category(cat_avgs)
+
+    @phase('save')
+    def save(self: ConcoursReport, directory: Path=None) -> Path:
+        """
+        Streamed in write-only mode: rows go to disk as they are made. Saved
+        as output/statistics_<concours>.xlsx by default.
+        """
+        template = ReportTemplate.load()
+
+        wb = openpyxl.Workbook(write_only=True)
+        for style in template.styles.values():
+            wb.add_named_style(copy(style))
 
-    def save(self: ConcoursReport):
-        wb = openpyxl.load_workbook(PATH_REPORT_TEMPLATE)
+        for (key, d, *mode) in self.generic_sheets():
+            ws = template.add_sheet(wb, key)
+            for row in self.generic_rows(d, *mode):
+                ws.append(row)
 
-        generics = (
+        for (key, places) in self.places_sheets():
+            self._save_places(wb, template, key, places)
+
+        for (key, fields, rows) in self.agreement_sheets():
+            ws = template.add_sheet(wb, key, fields=fields)
+            for row in rows:
+                ws.append(row)
+
+        path = (directory or PATH_OUTPUT) / f'statistics_{self.c.name}.xlsx'
+        wb.save(path)
+        return path
+
+    def generic_sheets(self: ConcoursReport) -> tuple[tuple]:
+        """(sheet, scorepads by item[, mode]) for every sheet but places."""
+        sheets = (
             ('contestants', self.contestant_to_sp),
             ('contestants_adjust', self.contestant_to_sp_adj),
             ('judges', self.judge_to_sp),
@@ -163,17 +530,17 @@ class ConcoursReport:
             ('schools_received', self.school_to_sp_received),
         )
 
-        for args in generics:
-            self._save_generic(wb, *args)
+        if self.severity:
+            sheets += (('contestants_severity', self.contestant_to_sp_sev),)
 
-        self._save_places(wb)
+        return sheets
 
-        path = PATH_OUTPUT / f'statistics_{self.c.name}.xlsx'
-        wb.save(path)
-    
-    def _save_generic(self: ConcoursReport, wb: Workbook, key: str, d: dict[object, set[Scorepad]], mode: str='average'):
+    def generic_rows(self: ConcoursReport, d: dict[object, Scorepad], mode: str='average') -> Iterator[list]:
         """
         mode can be 'average' or 'variance'
+
+        One row per item: item, N, total, then N, total and each criterion
+        for traditional, then the same for impromptu.
         """
 
         if mode == 'average':
@@ -186,36 +553,112 @@ class ConcoursReport:
             cb_total = lambda _: ''
             cb_indiv = lambda _: [''] * 5
 
-        ws = wb[key]
-        for (i, sp) in enumerate(self.sorted_sps_from_dict(d, cb_total)):
-            r = i + 2
-
+        for sp in self.sorted_sps_from_dict(d, cb_total):
             spt = sp.filter_traditional()
             spi = sp.filter_impromptu()
-            
-            ws[f'A{r}'] = str(sp.item)
-            ws[f'B{r}'] = sp.n
-            ws[f'C{r}'] = cb_total(sp)
-
-            ws[f'D{r}'] = spt.n
-            ws[f'E{r}'] = cb_total(spt)
-            assign_named_cells(ws, 'FGHIJ', r, cb_indiv(spt))
-
-            ws[f'K{r}'] = spi.n
-            ws[f'L{r}'] = cb_total(spi)
-            assign_named_cells(ws, 'MNOPQ', r, cb_indiv(spi))
-
-    def _save_places(self: ConcoursReport, wb: Workbook):
-        ws = wb['places']
-        for (i, cat) in enumerate(sorted(self.category_to_places)):
-            r_places = 2 + (2 * i)
-            r_scores = r_places + 1
-            sps = self.category_to_places[cat]
+
+            yield [
+                str(sp.item), sp.n, cb_total(sp),
+                spt.n, cb_total(spt), *cb_indiv(spt),
+                spi.n, cb_total(spi), *cb_indiv(spi),
+            ]
+
+    def agreement_sheets(self: ConcoursReport) -> tuple[tuple]:
+        """(sheet, fields, rows) for the optional sections: agreement and bootstrap."""
+        sheets = ()
+
+        if self.agreement:
+            sheets += (
+                ('judge_agreement', AGREEMENT_FIELDS, self.agreement_rows()),
+                ('category_icc', ICC_FIELDS, self.icc_rows()),
+            )
+
+        if self.bootstrap:
+            sheets += (('places_bootstrap', BOOTSTRAP_FIELDS, self.bootstrap_rows()),)
+
+        return sheets
+
+    def agreement_rows(self: ConcoursReport) -> Iterator[tuple]:
+        """Most disagreeing pairs of judges first."""
+        for (judge_a, judge_b, shared, correlations, mads) in self.agreement.pairs(AGREEMENT_MIN_SHARED):
+            yield str(judge_a), str(judge_b), shared, *correlations, *mads
+
+    def icc_rows(self: ConcoursReport) -> Iterator[tuple]:
+        for cat in sorted(self.category_to_icc):
+            (n_contestants, n_evaluations, icc) = self.category_to_icc[cat]
+            yield str(cat), n_contestants, n_evaluations, None if np.isnan(icc) else round(icc, 2)
+
+    def bootstrap_rows(self: ConcoursReport) -> Iterator[tuple]:
+        """
+        In the order of places, with each contestant's interval and chances of
+        that place, 1st and top 3. Placed by the same complete totals as were
+        resampled (see bootstrap.Placings), so that the place and its
+        probability always agree.
+        """
+        for cat in sorted(self.category_to_placings):
+            placings = self.category_to_placings[cat]
+            order = np.argsort(-placings.averages, kind='stable')
+
+            for (place, i) in enumerate(order):
+                p = placings.place_probabilities[i]
+                yield (
+                    str(cat), place + 1, str(placings.contestants[i]), round(float(placings.averages[i]), 1),
+                    round(float(placings.low[i]), 1), round(float(placings.high[i]), 1),
+                    round(float(p[place]), 3), round(float(p[0]), 3), round(float(p[:3].sum()), 3)
+                )
+
+    def places_sheets(self: ConcoursReport) -> tuple[tuple]:
+        """(sheet, places by category), as generic_sheets."""
+        if self.severity:
+            return ('places', self.category_to_places), ('places_severity', self.category_to_places_sev)
+
+        return (('places', self.category_to_places),)
+
+    def _save_places(self: ConcoursReport, wb: Workbook, template: ReportTemplate, key: str,
+                     places: dict[Category, list[Scorepad]]):
+        n_places = max((len(sps) for sps in places.values()), default=0)
+        ws = template.add_sheet(wb, key, n_places + 1)
+
+        for cat in sorted(places):
+            sps = places[cat]
 
             # Alternating rows: category / places on one row, scores on next
-            ws[f'A{r_places}'] = str(cat)
-            assign_n_cells(ws, 'B', r_places, (str(sp.item) for sp in sps))
-            assign_n_cells(ws, 'B', r_scores, (sp.average() for sp in sps), alignment='left')
+            ws.append([str(cat), *(str(sp.item) for sp in sps)])
+            ws.append([None, *(ReportTemplate.cell(ws, sp.average(), STYLE_SCORE) for sp in sps)])
+
+    @phase('export')
+    def export(self: ConcoursReport, suffix: str=SUFFIX_CSV, directory: Path=None):
+        """
+        The same tables as save, one file per sheet, as CSV, JSON lines or
+        Parquet (needs pyarrow). Places are one row per contestant rather than
+        alternating rows. Written to output/statistics_<concours>/ by default.
+        """
+        if suffix not in EXPORT_SUFFIXES:
+            raise ValueError(f'Cannot export to {suffix}; use one of {", ".join(EXPORT_SUFFIXES)}')
+
+        if suffix == SUFFIX_PARQUET and importlib.util.find_spec('pyarrow') is None:
+            raise ImportError('Parquet exports need pyarrow')
+
+        directory = directory or PATH_OUTPUT / f'statistics_{self.c.name}'
+        directory.mkdir(parents=True, exist_ok=True)
+        write = write_parquet if suffix == SUFFIX_PARQUET else write_rows
+
+        for (key, (fields, rows)) in self.tables().items():
+            write(directory / f'{key}{suffix}', fields, rows)
+
+    def tables(self: ConcoursReport) -> dict[str, tuple[tuple[str], Iterator]]:
+        """Every table, by sheet name, as fields and (lazy) rows, in the machine-readable layout of export."""
+        tables = {key: (GENERIC_FIELDS, self.generic_rows(d, *mode)) for (key, d, *mode) in self.generic_sheets()}
+        tables.update((key, (PLACES_FIELDS, self.places_rows(places))) for (key, places) in self.places_sheets())
+        tables.update((key, (fields, rows)) for (key, fields, rows) in self.agreement_sheets())
+
+        return tables
+
+    @staticmethod
+    def places_rows(places: dict[Category, list[Scorepad]]) -> Iterator[tuple]:
+        for cat in sorted(places):
+            for (i, sp) in enumerate(places[cat]):
+                yield str(cat), i + 1, str(sp.item), sp.average()
 
     @staticmethod
     def sorted_sps_from_dict(d: dict[object, Scorepad], cb: callable=None) -> list[Scorepad]:
@@ -233,113 +676,227 @@ class ConcoursReport:
     
     def school_report(self: ConcoursReport, school_name: str):
         """Print a report of students for this school."""
+        school = next((s for s in self.c.schools if s.name == school_name), None)
+        if school:
+            print(render_school_report(self.school_rows(school)))
 
-        for con in self.contestant_to_sp:
-            if con.school.name != school_name:
-                continue
+    def school_rows(self: ConcoursReport, school: School) -> list[tuple]:
+        """
+        Plain values for the school's report, one tuple per contestant:
+        name, labels, total, averages, then the same adjusted to category.
+        """
+        rows = []
 
-            labels = SCORE_LABELS[con.category.sformat]
+        for con in sorted(school.contestants, key=lambda con: con.name):
+            if con not in self.contestant_to_sp:
+                continue
 
             sp_absolute = self.contestant_to_sp[con]
             sp_relative = self.contestant_to_sp_adj[con]
-            score_a, scores_a = sp_absolute.average(), sp_absolute.averages()
-            score_r, scores_r = sp_relative.average(), sp_relative.averages()
 
-            print(con.name)
-            print('Total:', score_a, f'({score_r})')
+            rows.append((
+                con.name, SCORE_LABELS[con.category.sformat],
+                sp_absolute.average(), sp_absolute.averages(),
+                sp_relative.average(), sp_relative.averages()
+            ))
+
+        return rows
 
-            for i in range(5):            
-                print(f'{labels[i]}:', scores_a[i], f'({scores_r[i]})')
+    @phase('school_reports')
+    def save_school_reports(self: ConcoursReport, directory: Path=None, workers: int=None,
+                            schools: Iterable[School]=None) -> list[Path]:
+        """
+        Every school's report (or only these schools'), each to its own file,
+        in output/schools_<concours>/ by default. The values are read here
+        (they are already computed); the workers render and write the files.
+        """
+        directory = directory or PATH_OUTPUT / f'schools_{self.c.name}'
+        directory.mkdir(parents=True, exist_ok=True)
 
-            print()
+        # From every school, so that a school's file is the same whichever are saved
+        filenames = school_filenames(self.c.schools)
+        index = {key: filenames[school] for school in self.c.schools for key in (school.name, school.shortname) if key}
+        (directory / SCHOOL_REPORTS_INDEX).write_text(json.dumps(index, ensure_ascii=False, indent=1), encoding='utf-8')
+
+        jobs = [
+            (directory / f'{filenames[school]}.txt', self.school_rows(school))
+            for school in sorted(self.c.schools if schools is None else schools, key=lambda s: s.name)
+        ]
+
+        workers = workers or os.cpu_count() or 1
+        if workers < 2 or len(jobs) < 2:
+            return [write_school_report(*job) for job in jobs]
+
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+            return list(pool.map(write_school_report, *zip(*jobs), chunksize=max(1, len(jobs) // (4 * workers))))
 
 class Scorepad:
+    """
+    The evaluations sharing an item (a judge, a category...), as a view of
+    their rows in a ScoreStore. With offsets, each evaluation is seen less
+    the offsets of its item for offset_key: its category's averages (see
+    adjust_to_category), or its judge's severity (see severity.py). With by_sformat, it
+    also carries its evaluations split by format, kept up to date, so that
+    the sheets need not filter.
+
+    Statistics are kept as running means and sums of squared deviations (M2),
+    per criterion and for the total: computed in one vectorized pass the first
+    time they are needed, then updated in place (Welford) as rows are added,
+    so every statistic is an O(1) read. Running updates can differ from one
+    pass over the same rows in the last bits, so a rounded average can
+    differ by 0.1 from a rebuilt report's where it falls on a rounding
+    boundary (e.g. 7.25).
+    """
     item: object
-    evaluations: set[Evaluation]
+    store: ScoreStore
     n: int
+    offsets: np.ndarray
+    offset_key: str
+    by_sformat: dict[str, Scorepad]
+
+    _rows: np.ndarray # rows, then room to add more (see add_row)
+    _means: np.ndarray
+    _m2s: np.ndarray
+    _mean: float
+    _m2: float
+
+    def __init__(self: Scorepad, item: object, store: ScoreStore, rows: np.ndarray=None, offsets: np.ndarray=None,
+                 by_sformat: dict[str, Scorepad]=None, offset_key: str='category'):
+        self.item, self.store = item, store
+        self._rows = np.empty(0, dtype=np.intp) if rows is None else rows
+        self.n = len(self._rows)
+        self.offsets, self.offset_key = offsets, offset_key
+        self.by_sformat = by_sformat
+
+        # Filled in lazily by _compute
+        self._means = None
+
+    @staticmethod
+    def split(item: object, store: ScoreStore) -> Scorepad:
+        """An empty Scorepad with (empty) parts for each format."""
+        return Scorepad(item, store, by_sformat={sformat: Scorepad(item, store) for sformat in SFORMATS})
+
+    @property
+    def rows(self: Scorepad) -> np.ndarray:
+        return self._rows[:self.n]
+
+    @property
+    def evaluations(self: Scorepad) -> np.ndarray:
+        return self.store.evaluations[self.rows]
+
+    def scores(self: Scorepad) -> np.ndarray:
+        return self.scores_at(self.rows)
 
-    def __init__(self: Scorepad, item: object, evaluations: set[Evaluation]):
-        self.item, self.evaluations = item, evaluations
-        self.n = len(self.evaluations)
+    def scores_at(self: Scorepad, rows: np.ndarray) -> np.ndarray:
+        scores = self.store.scores[rows]
+        if self.offsets is not None:
+            scores = scores - self.offsets[self.store.column(self.offset_key)[rows]]
+
+        return scores
+
+    def add_row(self: Scorepad, row: int):
+        # Grown by doubling, as ScoreStore.append, so that adding n rows is O(n) rather than O(n^2). The rows
+        # given to __init__ may be shared (e.g. by adjust_to_category), but fill their array, so the first
+        # row added always copies them
+        if self.n == len(self._rows):
+            self._rows = np.resize(self._rows, max(16, 2 * self.n))
+
+        self._rows[self.n] = row
+        self.n += 1
+
+        if self.by_sformat is not None:
+            sformat = self.store.items['sformat'][self.store.column('sformat')[row]]
+            self.by_sformat.setdefault(sformat, self.empty()).add_row(row)
+
+        if self._means is None:
+            return
+
+        # Welford: numerically stable running mean and M2
+        x = self.scores_at(row)
+        delta = x - self._means
+        self._means = self._means + (delta / self.n)
+        self._m2s = self._m2s + (delta * (x - self._means))
+
+        total = float(x.sum())
+        delta = total - self._mean
+        self._mean += delta / self.n
+        self._m2 += delta * (total - self._mean)
+
+    def _compute(self: Scorepad):
+        if self._means is not None:
+            return
+
+        if not self.n:
+            self._means, self._m2s = np.zeros(N_CRITERIA), np.zeros(N_CRITERIA)
+            self._mean, self._m2 = 0.0, 0.0
+            return
 
-    def add_evaluation(self: Scorepad, e: Evaluation):
-        self.evaluations.add(e)
-        self.n = len(self.evaluations)
+        scores = self.scores()
+        self._means = scores.mean(axis=0)
+        self._m2s = ((scores - self._means) ** 2).sum(axis=0)
 
-    def filter_evaluations(self: Scorepad, cb: callable) -> Scorepad:
-        return Scorepad(self.item, set(filter(cb, self.evaluations)))
+        totals = scores.sum(axis=1)
+        self._mean = float(totals.mean())
+        self._m2 = float(((totals - self._mean) ** 2).sum())
+
+    def filter_key(self: Scorepad, key: str, item: object) -> Scorepad:
+        """Only the evaluations whose key (see scorestore.KEYS) is item."""
+        code = self.store.code_of(key, item)
+        rows = self.rows[self.store.column(key)[self.rows] == code] if code is not None else self.rows[:0]
+        return Scorepad(self.item, self.store, rows, self.offsets, offset_key=self.offset_key)
+
+    def filter_sformat(self: Scorepad, sformat: str) -> Scorepad:
+        if self.by_sformat is not None:
+            return self.by_sformat.get(sformat) or self.empty()
+
+        return self.filter_key('sformat', sformat)
 
     def filter_traditional(self: Scorepad) -> Scorepad:
-        return self.filter_evaluations(lambda e: e.sformat == 'Traditionnel')
+        return self.filter_sformat('Traditionnel')
 
     def filter_impromptu(self: Scorepad) -> Scorepad:
-        return self.filter_evaluations(lambda e: e.sformat == 'Impromptu')
+        return self.filter_sformat('Impromptu')
     
-    def adjust_to_category(self: Scorepad, cat_sps: dict[Category, set[Scorepad]]) -> Scorepad:
+    def adjust_to_category(self: Scorepad, cat_avgs: np.ndarray) -> Scorepad:
         """
-        Take this Scorepad's evaluations and adjust them by subtracting the average
-        of any other Scorepads whose item matches this one's category.
+        This Scorepad's evaluations less their category's averages, given by
+        category code (see ConcoursReport.category_averages). Nothing is copied:
+        the result views the same rows and subtracts when it computes.
         """
+        return self.adjust_to('category', cat_avgs)
 
-        new_es = []
-        for e in self.evaluations:
-            cat_avgs = cat_sps[e.category].averages()
+    def adjust_to(self: Scorepad, key: str, offsets: np.ndarray) -> Scorepad:
+        """As adjust_to_category, less offsets by code for any key (see scorestore.KEYS)."""
+        by_sformat = None
+        if self.by_sformat is not None:
+            by_sformat = {sformat: sp.adjust_to(key, offsets) for (sformat, sp) in self.by_sformat.items()}
 
-            new_scores = []
-            for i in range(5):
-                new_scores.append(e.scores[i] - cat_avgs[i])
-            
-            new_e = Evaluation(e.judge, e.speech, new_scores)
-            new_es.append(new_e)
-        
-        return Scorepad(self.item, new_es)
+        return Scorepad(self.item, self.store, self.rows, offsets, by_sformat, key)
+
+    def empty(self: Scorepad) -> Scorepad:
+        """No rows, but the same item and adjustment."""
+        return Scorepad(self.item, self.store, offsets=self.offsets, offset_key=self.offset_key)
     
     def average(self: Scorepad) -> float:
-        if not self.n:
-            return 0.0
-        else:
-            return round(sum(sum(e.scores) for e in self.evaluations) / self.n, 1)
+        self._compute()
+        return round(self._mean, 1)
     
     def averages(self: Scorepad) -> list[float]:
-        totals = [0.0, 0.0, 0.0, 0.0, 0.0]
-        if not self.n:
-            return totals
-
-        for e in self.evaluations:
-            for i in range(5):
-                totals[i] += e.scores[i]
-
-        for i in range(5):
-                totals[i] = round(totals[i] / self.n, 1)
-
-        return totals
+        self._compute()
+        return [round(float(m), 1) for m in self._means]
         
     def variance(self: Scorepad) -> float:
+        """About the rounded average, as reported: M2 / n plus the rounding's square."""
         if not self.n:
             return 0.0
-        else:
-            total = 0.0
 
-            mean = self.average()
-            for e in self.evaluations:
-                diff = sum(e.scores) - mean
-                total += diff ** 2
-        
-            return round(total / self.n, 1)
+        self._compute()
+        return round((self._m2 / self.n) + ((self._mean - round(self._mean, 1)) ** 2), 1)
         
     def variances(self: Scorepad) -> list[float]:
-        totals = [0.0, 0.0, 0.0, 0.0, 0.0]
         if not self.n:
-            return totals
-        
-        means = self.averages()
-
-        for e in self.evaluations:
-            for i in range(5):
-                diff = e.scores[i] - means[i]
-                totals[i] += diff ** 2
-
-        for i in range(5):
-                totals[i] = round(totals[i] / self.n, 1)
+            return [0.0] * N_CRITERIA
 
-        return totals
+        self._compute()
+        offsets = self._means - self.averages()
+        return [round(float(v), 1) for v in (self._m2s / self.n) + (offsets ** 2)]
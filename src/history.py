@@ -0,0 +1,239 @@
+"""
+Results across concours (i.e. years), in a local SQLite database, so that
+schools, judges and categories can be compared without reparsing anything.
+
+Each concours is saved whole, in one transaction, replacing any previous save
+under the same name and year (the workbooks keep their names from one year
+to the next). Schools, judges and categories are per concours rows; across
+concours they are matched by name (or shortname, for categories), which is
+what the queries group by.
+"""
+
+from __future__ import annotations
+from pathlib import Path
+from concours import *
+import sqlite3
+
+PATH_BASE = Path('./src')
+PATH_HISTORY = PATH_BASE / 'output' / 'history.sqlite'
+
+# PRAGMA user_version; before 2, a concours was unique by name alone
+SCHEMA_VERSION = 2
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS concours (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    year INTEGER,
+    UNIQUE (name, year)
+);
+
+CREATE TABLE IF NOT EXISTS schools (
+    id INTEGER PRIMARY KEY,
+    concours_id INTEGER NOT NULL REFERENCES concours(id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    shortname TEXT
+);
+
+CREATE TABLE IF NOT EXISTS categories (
+    id INTEGER PRIMARY KEY,
+    concours_id INTEGER NOT NULL REFERENCES concours(id) ON DELETE CASCADE,
+    shortname TEXT NOT NULL,
+    sformat TEXT NOT NULL,
+    grade TEXT NOT NULL,
+    level TEXT NOT NULL,
+    base_duration INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS judges (
+    id INTEGER PRIMARY KEY,
+    concours_id INTEGER NOT NULL REFERENCES concours(id) ON DELETE CASCADE,
+    school_id INTEGER REFERENCES schools(id),
+    name TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS contestants (
+    id INTEGER PRIMARY KEY,
+    concours_id INTEGER NOT NULL REFERENCES concours(id) ON DELETE CASCADE,
+    school_id INTEGER REFERENCES schools(id),
+    category_id INTEGER REFERENCES categories(id),
+    name TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS evaluations (
+    id INTEGER PRIMARY KEY,
+    concours_id INTEGER NOT NULL REFERENCES concours(id) ON DELETE CASCADE,
+    judge_id INTEGER REFERENCES judges(id),
+    contestant_id INTEGER NOT NULL REFERENCES contestants(id),
+    category_id INTEGER NOT NULL REFERENCES categories(id),
+    sformat TEXT NOT NULL,
+    grade TEXT NOT NULL,
+    level TEXT NOT NULL,
+    duration INTEGER,
+    score1 REAL, score2 REAL, score3 REAL, score4 REAL, score5 REAL,
+    total REAL
+);
+
+CREATE INDEX IF NOT EXISTS schools_name ON schools(name);
+CREATE INDEX IF NOT EXISTS categories_shortname ON categories(shortname);
+CREATE INDEX IF NOT EXISTS judges_name ON judges(name);
+CREATE INDEX IF NOT EXISTS contestants_school ON contestants(school_id);
+CREATE INDEX IF NOT EXISTS evaluations_concours ON evaluations(concours_id);
+CREATE INDEX IF NOT EXISTS evaluations_judge ON evaluations(judge_id);
+CREATE INDEX IF NOT EXISTS evaluations_contestant ON evaluations(contestant_id);
+CREATE INDEX IF NOT EXISTS evaluations_category ON evaluations(category_id);
+CREATE INDEX IF NOT EXISTS evaluations_sformat ON evaluations(sformat, grade, level);
+'''
+
+# What evaluations can be grouped by, as ConcoursReport does: the joins it
+# needs and the expression naming each group (the same across concours)
+KEY_TO_GROUP = {
+    'contestant': ('JOIN contestants AS k ON k.id = e.contestant_id', 'k.name'),
+    'judge': ('JOIN judges AS k ON k.id = e.judge_id', 'k.name'),
+    'category': ('JOIN categories AS k ON k.id = e.category_id', 'k.shortname'),
+    'sformat': ('', 'e.sformat'),
+    'grade': ('', 'e.grade'),
+    'level': ('', 'e.level'),
+    'duration': ('', 'CAST(ROUND(e.duration / 60.0) AS INTEGER)'),
+    'school_given': ('JOIN judges AS j ON j.id = e.judge_id JOIN schools AS k ON k.id = j.school_id', 'k.name'),
+    'school_received': ('JOIN contestants AS c ON c.id = e.contestant_id JOIN schools AS k ON k.id = c.school_id', 'k.name'),
+}
+
+class HistoryStore:
+    """
+    >>> with HistoryStore() as history:
+    ...     history.save(c, 2024)
+    ...     history.averages('school_received')
+    """
+    path: Path
+    db: sqlite3.Connection
+
+    def __init__(self: HistoryStore, path: Path=PATH_HISTORY):
+        self.path = path
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        self.db = sqlite3.connect(path)
+        self.db.execute('PRAGMA foreign_keys = ON')
+
+        (version,) = self.db.execute('PRAGMA user_version').fetchone()
+        if version < SCHEMA_VERSION and self.db.execute("SELECT 1 FROM sqlite_master WHERE name = 'concours'").fetchone():
+            self._migrate()
+
+        self.db.executescript(SCHEMA)
+        self.db.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+
+    def _migrate(self: HistoryStore):
+        """
+        Key an older database's concours on (name, year). SQLite cannot change
+        a constraint, so the table is copied; with foreign keys off, the other
+        tables keep pointing at the same ids.
+        """
+        self.db.execute('PRAGMA foreign_keys = OFF')
+        self.db.executescript('''
+            BEGIN;
+            CREATE TABLE concours_new (id INTEGER PRIMARY KEY, name TEXT NOT NULL, year INTEGER, UNIQUE (name, year));
+            INSERT INTO concours_new SELECT id, name, year FROM concours;
+            DROP TABLE concours;
+            ALTER TABLE concours_new RENAME TO concours;
+            COMMIT;
+        ''')
+        self.db.execute('PRAGMA foreign_keys = ON')
+
+    def __enter__(self: HistoryStore) -> HistoryStore:
+        return self
+
+    def __exit__(self: HistoryStore, *_):
+        self.close()
+
+    def close(self: HistoryStore):
+        self.db.close()
+
+    def save(self: HistoryStore, c: Concours, year: int=None):
+        """
+        The concours, its participants and its scoreboard (if any), in one
+        transaction. Ids are assigned here, so each table is one executemany.
+        """
+        with self.db:
+            # IS rather than =, so that saves without a year replace each other too
+            self.db.execute('DELETE FROM concours WHERE name = ? AND year IS ?', (c.name, year))
+            concours_id = self.db.execute('INSERT INTO concours (name, year) VALUES (?, ?)', (c.name, year)).lastrowid
+
+            school_ids = self._ids('schools', sorted(c.schools, key=lambda s: s.name))
+            self.db.executemany('INSERT INTO schools VALUES (?, ?, ?, ?)', (
+                (school_ids[school], concours_id, school.name, school.shortname) for school in school_ids
+            ))
+
+            category_ids = self._ids('categories', sorted(c.categories))
+            self.db.executemany('INSERT INTO categories VALUES (?, ?, ?, ?, ?, ?, ?)', (
+                (category_ids[cat], concours_id, cat.shortname(), cat.sformat, cat.grade, cat.level, cat.base_duration)
+                for cat in category_ids
+            ))
+
+            # Judges are repeated per period; one row per person
+            judges = {(j.name, j.school): j for j in c.judges}
+            judge_ids = self._ids('judges', sorted(judges, key=lambda key: (key[0], key[1].name)))
+            self.db.executemany('INSERT INTO judges VALUES (?, ?, ?, ?)', (
+                (judge_ids[key], concours_id, school_ids.get(key[1]), key[0]) for key in judge_ids
+            ))
+
+            contestant_ids = self._ids('contestants', sorted(c.contestants, key=lambda con: con.name))
+            self.db.executemany('INSERT INTO contestants VALUES (?, ?, ?, ?, ?)', (
+                (contestant_ids[con], concours_id, school_ids.get(con.school), category_ids.get(con.category), con.name)
+                for con in contestant_ids
+            ))
+
+            if c.scoreboard:
+                self.db.executemany(
+                    'INSERT INTO evaluations (concours_id, judge_id, contestant_id, category_id, sformat, grade, level, '
+                    'duration, score1, score2, score3, score4, score5, total) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    (
+                        (
+                            concours_id, judge_ids.get((e.judge.name, e.judge.school)) if e.judge else None,
+                            contestant_ids[e.contestant], category_ids[e.category], e.sformat, e.grade, e.level,
+                            e.speech.duration, *(e.scores or (None,) * 5),
+                            None if (e.scores is None or None in e.scores) else sum(e.scores)
+                        )
+                        for e in c.scoreboard.evaluations
+                    )
+                )
+
+    def _ids(self: HistoryStore, table: str, items: list) -> dict[object, int]:
+        """The next free ids of the table, in order of items."""
+        (last,) = self.db.execute(f'SELECT COALESCE(MAX(id), 0) FROM {table}').fetchone()
+        return {item: last + 1 + i for (i, item) in enumerate(items)}
+
+    def concours(self: HistoryStore) -> list[tuple[str, int]]:
+        return self.db.execute('SELECT name, year FROM concours ORDER BY year, name').fetchall()
+
+    def averages(self: HistoryStore, key: str, name: str=None, concours: str=None) -> list[tuple]:
+        """
+        Like the report's sheets for key (see KEY_TO_GROUP), across every
+        concours saved: (concours, year, item, N, average total), best first
+        within each concours. Narrowed to one item or one concours if given.
+        Only evaluations with every score count.
+        """
+        (joins, item) = KEY_TO_GROUP[key]
+        conditions, params = ['e.total IS NOT NULL'], []
+
+        if name is not None:
+            conditions.append(f'{item} = ?')
+            params.append(name)
+
+        if concours is not None:
+            conditions.append('x.name = ?')
+            params.append(concours)
+
+        query = f'''
+            SELECT x.name, x.year, {item} AS item, COUNT(*), ROUND(AVG(e.total), 1) AS average
+            FROM evaluations AS e
+            JOIN concours AS x ON x.id = e.concours_id
+            {joins}
+            WHERE {' AND '.join(conditions)}
+            GROUP BY x.id, item
+            ORDER BY x.year, x.name, average DESC
+        '''
+        return self.db.execute(query, params).fetchall()
+
+    def query(self: HistoryStore, sql: str, params: tuple=()) -> list[tuple]:
+        """Anything else: see SCHEMA."""
+        return self.db.execute(sql, params).fetchall()
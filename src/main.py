@@ -1,36 +1,314 @@
+"""
+    python src/main.py [--profile [--cprofile]] [command] [options]
+
+    validate        parse (or load the cached model) and list what looks wrong
+    schedule        create a schedule and save it (see schedulereport.py)
+    report          the statistics workbook, and exports (see evaluations.py)
+    school-report   every school's report, or print one school's
+    watch           keep the outputs current while the inputs are edited (see watch.py)
+    serve           live results over HTTP (see server.py)
+    batch           every concours under a directory, in parallel (see batch.py)
+
+Without a command, report and school reports, as always. python src/main.py
+<command> --help lists each command's options.
+
+Inputs are input/concours.xlsx and input/evaluations.xlsx unless given; a
+concours directory and a .csv or .jsonl evaluations file are read as plain
+text (see input/readme.md). The parsed workbooks are cached (see
+parsecache.py), so only the first command after an edit parses them.
+
+Modules are imported by the commands that use them: validating a cached
+model, or printing a school report that is up to date, needs neither
+openpyxl nor numpy, and starts in tens of milliseconds.
+"""
+
+from __future__ import annotations
 from pathlib import Path
-from parser import ConcoursParser, ScoreboardParser
-from schedule import ConcoursScheduler as CS
-from evaluations import ConcoursReport as CR
-from evaluations import SCORE_LABELS
+from concours import *
+from profiling import phase
+import argparse
+import datetime
+import importlib.util
+import json
+import os
+import profiling
+import sys
 
 PATH_BASE = Path('./src')
 PATH_INPUT = PATH_BASE / 'input'
 PATH_OUTPUT = PATH_BASE / 'output'
 PATH_TEMPLATES = PATH_BASE / 'templates'
 
-# TODO
-PATH_HARDCODED_CONCOURS_FILE = PATH_INPUT / 'concours.xlsx'
-PATH_HARDCODED_EVALUATIONS_FILE = PATH_INPUT / 'evaluations.xlsx'
+PATH_DEFAULT_CONCOURS_FILE = PATH_INPUT / 'concours.xlsx'
+PATH_DEFAULT_EVALUATIONS_FILE = PATH_INPUT / 'evaluations.xlsx'
+
+# As in evaluations.py, which printing a saved school report does not import
+SCHOOL_REPORTS_INDEX = 'schools.json'
+
+def load(args: argparse.Namespace) -> Concours:
+    """The concours, with its scoreboard if there are evaluations."""
+    from parsecache import load_concours
+
+    evaluations = args.evaluations if args.evaluations.exists() else None
+    return load_concours(args.concours, evaluations, cache=not args.no_cache)
+
+def validate(args: argparse.Namespace) -> int:
+    c = load(args)
+
+    judges = set((j.name, j.school) for j in c.judges)
+    evaluations = len(c.scoreboard.evaluations) if c.scoreboard else 0
+    print(
+        f'{c.name}: {len(c.schools)} schools, {len(c.categories)} categories, {len(c.contestants)} contestants, '
+        f'{len(judges)} judges, {len(c.periods)} periods, {len(c.rooms)} rooms, {evaluations} evaluations'
+    )
+
+    problems = c.problems()
+    for problem in problems:
+        print(problem)
+
+    print(f'{len(problems)} problems' if problems else 'No problems')
+    return 1 if problems else 0
+
+def schedule(args: argparse.Namespace) -> int:
+    from schedule import ConcoursScheduler
+    from schedulereport import ScheduleReport
+
+    c = load(args)
+    with phase('schedule'):
+        sched = ConcoursScheduler.create_valid_schedule(c)
+
+    if not sched:
+        print('Could not create a valid schedule.')
+        return 1
+
+    if args.print:
+        sched.pretty_print()
+
+    # Grid, running orders and itineraries; starts (by period) give times of day
+    report = ScheduleReport(sched, starts=dict(args.start))
+    print(f'Schedule written to {report.save()}')
+
+    for suffix in args.export:
+        report.export(suffix)
+
+    return 0
+
+def report(args: argparse.Namespace) -> int:
+    # Before anything is written, rather than failing after the workbook
+    if '.parquet' in args.export and importlib.util.find_spec('pyarrow') is None:
+        print('Parquet exports need pyarrow (pip install pyarrow)')
+        return 1
+
+    from evaluations import ConcoursReport
+
+    c = load(args)
+    with phase('report'):
+        report = ConcoursReport(c, severity=args.severity, agreement=args.agreement, bootstrap=args.bootstrap,
+                                workers=args.workers or os.cpu_count() or 1)
+    print(f'Report written to {report.save()}')
+
+    # The same tables for machines: '.csv', '.jsonl' or '.parquet' (with pyarrow)
+    for suffix in args.export:
+        report.export(suffix)
+
+    # Keep the results for comparing years (see history.py)
+    if args.history is not None:
+        from history import HistoryStore
+
+        with HistoryStore() as history:
+            history.save(c, args.history)
+
+    if args.school_reports:
+        report.save_school_reports(workers=args.workers)
+
+    return 0
+
+def school_report(args: argparse.Namespace) -> int:
+    """One file per school, in output/schools_<concours>/, or print one (from its file if up to date)."""
+    if args.school:
+        path = school_report_path(PATH_OUTPUT / f'schools_{args.concours.stem}', args.school)
+        if path and is_newer(path, args.concours, args.evaluations):
+            print(path.read_text(encoding='utf-8'))
+            return 0
+
+    from evaluations import ConcoursReport
+
+    c = load(args)
+    schools = c.schools
+    if args.school:
+        schools = [school for school in c.schools if args.school in (school.name, school.shortname)]
+        if not schools:
+            print(f'Could not find school {args.school}')
+            return 1
+
+    with phase('report'):
+        report = ConcoursReport(c)
+    paths = report.save_school_reports(workers=args.workers, schools=schools)
+
+    if args.school:
+        print(paths[0].read_text(encoding='utf-8'))
+
+    return 0
+
+def watch(args: argparse.Namespace) -> int:
+    """Keep the outputs current while the inputs are edited (see watch.py)."""
+    from watch import Watcher
+
+    Watcher(args.concours, args.evaluations, schedule=args.schedule).run()
+    return 0
+
+def serve(args: argparse.Namespace) -> int:
+    """Live results while scores come in (see server.py)."""
+    from evaluations import ConcoursReport
+    from server import LiveServer, HOST, PORT
+    from textparser import ScoreboardTail
+
+    c = load(args)
+    tail = ScoreboardTail.follow(args.follow, c) if args.follow else None
+    LiveServer(ConcoursReport(c), tail, args.host or HOST, args.port or PORT).run()
+    return 0
+
+def batch(args: argparse.Namespace) -> int:
+    """Every concours under a directory, in worker processes, then a summary of all (see batch.py)."""
+    from batch import discover, run_batch, write_summary
+
+    jobs = discover(args.root, schedule=args.schedule)
+    if not jobs:
+        print(f'No concours under {args.root}')
+        return 1
+
+    results = run_batch(jobs, args.workers)
+    print(f'Summary written to {write_summary(results, suffix=args.format)}')
+
+    failed = [result for result in results if result.error]
+    for result in failed:
+        print(f'{result.name} failed:\n{result.error}')
+
+    return 1 if failed else 0
+
+def run(args: argparse.Namespace) -> int:
+    """What main.py always did: the report, then every school's."""
+    args.severity = args.agreement = args.bootstrap = False
+    args.export, args.history = [], None
+    args.school_reports, args.workers = True, None
+
+    return report(args)
+
+def is_newer(path: Path, *inputs: Path) -> bool:
+    """Whether path exists, and was written after every input (or file in an input directory) changed."""
+    try:
+        written = path.stat().st_mtime_ns
+    except OSError:
+        return False
+
+    for p in inputs:
+        files = [f for f in p.iterdir() if f.is_file()] if p.is_dir() else [p]
+        if any(f.exists() and f.stat().st_mtime_ns > written for f in files):
+            return False
+
+    return True
+
+def school_report_path(directory: Path, school: str) -> Path|None:
+    """The saved report of a school, by name or shortname, as listed beside the reports."""
+    try:
+        index = json.loads((directory / SCHOOL_REPORTS_INDEX).read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return None
+
+    return directory / f'{index[school]}.txt' if school in index else None
+
+def period_start(s: str) -> tuple[str, datetime.time]:
+    """PERIOD=HH:MM, e.g. P1=09:00."""
+    (period, _, time) = s.partition('=')
+    try:
+        return period, datetime.time.fromisoformat(time)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'{s} is not PERIOD=HH:MM')
+
+def input_arguments(concours: Path, evaluations: Path, no_cache: bool) -> argparse.ArgumentParser:
+    """A parent parser of the input options, with these defaults."""
+    inputs = argparse.ArgumentParser(add_help=False)
+    inputs.add_argument('--concours', type=Path, default=concours,
+                        help='concours.xlsx, or a plain-text concours directory')
+    inputs.add_argument('--evaluations', type=Path, default=evaluations,
+                        help='evaluations.xlsx, .csv or .jsonl; optional for schedule and validate')
+    inputs.add_argument('--no-cache', action='store_true', default=no_cache, help='parse the workbooks even if cached')
+
+    return inputs
+
+def arguments() -> argparse.ArgumentParser:
+    # The input options go before or after the command; only the top level has defaults, so that
+    # the command's (suppressed unless given) never overwrite options given before it
+    args = argparse.ArgumentParser(description='Concours scheduling and results.',
+                                   parents=[input_arguments(PATH_DEFAULT_CONCOURS_FILE, PATH_DEFAULT_EVALUATIONS_FILE, False)])
+    inputs = input_arguments(argparse.SUPPRESS, argparse.SUPPRESS, argparse.SUPPRESS)
+
+    args.add_argument('--profile', action='store_true', help='time each phase (see profiling.py)')
+    args.add_argument('--cprofile', action='store_true', help='with --profile, also a .prof per phase')
+    args.set_defaults(command=run)
+
+    commands = args.add_subparsers(title='commands', metavar='command')
+
+    command = commands.add_parser('validate', parents=[inputs], help='parse, and list what looks wrong')
+    command.set_defaults(command=validate)
+
+    command = commands.add_parser('schedule', parents=[inputs], help='create a schedule, and save it')
+    command.add_argument('--print', action='store_true', help='also print it')
+    command.add_argument('--start', type=period_start, action='append', default=[], metavar='PERIOD=HH:MM',
+                         help='when a period starts, for times of day (repeatable)')
+    command.add_argument('--export', action='append', default=[], choices=('.csv', '.jsonl'))
+    command.set_defaults(command=schedule)
+
+    command = commands.add_parser('report', parents=[inputs], help='the statistics workbook')
+    command.add_argument('--severity', action='store_true', help='also judge-adjusted contestants and places')
+    command.add_argument('--agreement', action='store_true', help='also judge agreement and category ICCs')
+    command.add_argument('--bootstrap', action='store_true', help='also intervals and probabilities of places')
+    command.add_argument('--export', action='append', default=[], choices=('.csv', '.jsonl', '.parquet'))
+    command.add_argument('--history', type=int, metavar='YEAR', help='also save to output/history.sqlite')
+    command.add_argument('--school-reports', action='store_true', help='also every school report')
+    command.add_argument('--workers', type=int, help='processes for the bootstrap and school reports; default: one per CPU')
+    command.set_defaults(command=report)
+
+    command = commands.add_parser('school-report', parents=[inputs], help="school reports, or print one school's")
+    command.add_argument('--school', help='name or shortname; print only this one')
+    command.add_argument('--workers', type=int)
+    command.set_defaults(command=school_report)
+
+    command = commands.add_parser('watch', parents=[inputs], help='redo what changed as the inputs are edited')
+    command.add_argument('--schedule', action='store_true', help='also reschedule when the concours changes')
+    command.set_defaults(command=watch)
+
+    command = commands.add_parser('serve', parents=[inputs], help='live results over HTTP')
+    command.add_argument('--follow', type=Path, help='a .csv or .jsonl evaluations file to poll for new lines')
+    command.add_argument('--host', help='default: 127.0.0.1, this machine only; 0.0.0.0 for every interface')
+    command.add_argument('--port', type=int, help='default: 8000')
+    command.set_defaults(command=serve)
+
+    command = commands.add_parser('batch', help='every concours under a directory, in parallel')
+    command.add_argument('root', type=Path, nargs='?', default=PATH_INPUT,
+                         help='searched for concours.xlsx (or concours/) and evaluations; default: input/')
+    command.add_argument('--schedule', action='store_true', help='also schedule each concours')
+    command.add_argument('--workers', type=int, help='processes; default: one per CPU')
+    command.add_argument('--format', default='.csv', choices=('.csv', '.jsonl'), help='of the summary')
+    command.set_defaults(command=batch)
+
+    return args
 
-def run():
-    c = ConcoursParser.parse(PATH_HARDCODED_CONCOURS_FILE)
+def main(argv: list[str]=None) -> int:
+    args = arguments().parse_args(argv)
 
-    # for cat in c.categories:
-    #     print(cat, cat.base_duration, len(cat.contestants), cat.projected_duration())
+    # Or CONCOURS_PROFILE=1 (see profiling.py)
+    if args.profile:
+        profiling.enable(cprofile=args.cprofile)
 
-    # sched = CS.create_valid_schedule(c)
-    # if sched:
-    #     sched.pretty_print()
-    # else:
-    #     print('Could not create a valid schedule.')
+    with phase('run'):
+        status = args.command(args)
 
-    ScoreboardParser.parse(PATH_HARDCODED_EVALUATIONS_FILE, c)
-    report = CR(c)
-    report.save()
+    if profiling.enabled():
+        profiling.print_summary()
+        print(f'Profile written to {profiling.write_summary()}')
 
-    # TD
-    report.school_report('TDChristian')    
+    return status
 
 if __name__ == '__main__':
-    run()
+    sys.exit(main())
@@ -0,0 +1,166 @@
+"""
+The parsed model, pickled, so that nothing is parsed twice: the xlsx inputs
+take seconds to read, the pickle a fraction of that. Kept apart from the
+parsers, which are only imported on a miss, so that a hit costs no openpyxl.
+"""
+
+from pathlib import Path
+from concours import *
+from profiling import phase
+import hashlib
+import pickle
+
+PATH_BASE = Path('./src')
+PATH_CACHE = PATH_BASE / 'cache'
+
+# Bump whenever the model classes change shape, so stale pickles are ignored
+CACHE_VERSION = 3
+
+SUFFIX_XLSX = '.xlsx'
+
+def load_concours(concours_path: Path, evaluations_path: Path=None, cache: bool=True,
+                  concurrent: bool=True) -> Concours:
+    """
+    The concours, with its scoreboard if there are evaluations, from either
+    format (see textparser): workbooks from the cache unless cache is False,
+    plain text always parsed, as it is quick to read. Without concurrent, the
+    workbooks are read one after the other in this process (see ParseCache.parse).
+    """
+    xlsx_evaluations = evaluations_path if evaluations_path and evaluations_path.suffix == SUFFIX_XLSX else None
+    text_evaluations = evaluations_path if evaluations_path and not xlsx_evaluations else None
+
+    if concours_path.is_dir():
+        from textparser import ConcoursTextParser
+        c = ConcoursTextParser.parse(concours_path)
+
+        if xlsx_evaluations:
+            from parser import ScoreboardParser
+            ScoreboardParser.parse(xlsx_evaluations, c)
+
+    elif cache:
+        c = ParseCache.parse(concours_path, xlsx_evaluations, concurrent)
+
+    else:
+        from parser import ConcoursParser, ScoreboardParser
+        c = ConcoursParser.parse(concours_path)
+
+        if xlsx_evaluations:
+            ScoreboardParser.parse(xlsx_evaluations, c)
+
+    if text_evaluations:
+        from textparser import ScoreboardTextParser
+        ScoreboardTextParser.parse(text_evaluations, c)
+
+    return c
+
+class ParseCache:
+    """
+    Pickle of the parsed Concours (and its Scoreboard), stored alongside a
+    signature of each input file. A cache file holds two pickles: the header
+    (version and signatures), then the model, so an invalid cache is rejected
+    without unpickling the model.
+    """
+
+    @staticmethod
+    def parse(concours_path: Path, evaluations_path: Path=None, concurrent: bool=True) -> Concours:
+        """
+        Parse both files, or load the cached model if neither has changed.
+        concurrent reads them at the same time, in a worker process (see
+        ConcurrentParser); turn it off in a process that is itself a worker.
+        """
+        with phase('load_cache'):
+            c = ParseCache.load(concours_path, evaluations_path)
+        if c is not None:
+            return c
+
+        # Only now, so that a cache hit needs neither the parsers nor openpyxl
+        from parser import ConcoursParser, ConcurrentParser
+
+        with phase('parse'):
+            if evaluations_path and concurrent:
+                c = ConcurrentParser.parse(concours_path, evaluations_path)
+            elif evaluations_path:
+                c = ConcurrentParser.parse_sequential(concours_path, evaluations_path)
+            else:
+                c = ConcoursParser.parse(concours_path)
+
+        with phase('save_cache'):
+            ParseCache.save(c, concours_path, evaluations_path)
+        return c
+
+    @staticmethod
+    def load(concours_path: Path, evaluations_path: Path=None) -> Concours|None:
+        path = ParseCache.path_for(concours_path, evaluations_path)
+        if not path.exists():
+            return None
+
+        try:
+            with open(path, 'rb') as f:
+                version, signatures = pickle.load(f)
+                if version != CACHE_VERSION:
+                    return None
+
+                if not all(ParseCache.signature_matches(sig) for sig in signatures):
+                    return None
+
+                return pickle.load(f)
+
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ValueError):
+            # Corrupt or written by an incompatible model; just reparse
+            return None
+
+    @staticmethod
+    def save(c: Concours, concours_path: Path, evaluations_path: Path=None):
+        paths = [p for p in (concours_path, evaluations_path) if p]
+        header = (CACHE_VERSION, [ParseCache.signature(p) for p in paths])
+
+        PATH_CACHE.mkdir(parents=True, exist_ok=True)
+        path = ParseCache.path_for(concours_path, evaluations_path)
+
+        # Write aside and swap so a crash never leaves a half-written cache
+        tmp = path.with_suffix('.tmp')
+        with open(tmp, 'wb') as f:
+            pickle.dump(header, f, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(c, f, protocol=pickle.HIGHEST_PROTOCOL)
+        tmp.replace(path)
+
+    @staticmethod
+    def path_for(concours_path: Path, evaluations_path: Path=None) -> Path:
+        key = '|'.join(str(Path(p).resolve()) for p in (concours_path, evaluations_path) if p)
+        digest = hashlib.blake2b(key.encode(), digest_size=8).hexdigest()
+        return PATH_CACHE / f'{Path(concours_path).stem}-{digest}.pickle'
+
+    @staticmethod
+    def signature(path: Path) -> tuple[str, int, int, str]:
+        st = path.stat()
+        return str(path.resolve()), st.st_size, st.st_mtime_ns, ParseCache.digest(path)
+
+    @staticmethod
+    def signature_matches(sig: tuple[str, int, int, str]) -> bool:
+        """
+        Size and mtime unchanged is trusted as-is; otherwise fall back to the
+        content hash, so a file that was merely touched or copied still hits.
+        """
+        path, size, mtime_ns, digest = sig
+        path = Path(path)
+
+        try:
+            st = path.stat()
+        except OSError:
+            return False
+
+        if st.st_size != size:
+            return False
+
+        if st.st_mtime_ns == mtime_ns:
+            return True
+
+        return ParseCache.digest(path) == digest
+
+    @staticmethod
+    def digest(path: Path) -> str:
+        h = hashlib.blake2b()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                h.update(chunk)
+        return h.hexdigest()
@@ -1,48 +1,63 @@
 from pathlib import Path
 from concours import *
+from textparser import TextWriter, SUFFIX_CSV
 import openpyxl
 import warnings
+from concurrent.futures import ProcessPoolExecutor
+import os
 
 SFORMAT_TRADITIONAL = 'Traditionnel'
 SFORMAT_IMPROMPTU = 'Impromptu'
 
+# Sheets to decode from concours.xlsx; volunteers is optional
+CONCOURS_SHEETS = ('rooms', 'participants', 'volunteers')
+EVALUATIONS_SHEET = 'Evaluations'
+
 class ConcoursParser:
+    """
+    Parsing is split in two: read decodes the workbook into plain cell values
+    (the expensive, openpyxl part, picklable so it can run in another process)
+    and build links those values into the model.
+    """
     
     @staticmethod
     def parse(path: Path) -> Concours:
-        c = Concours(path.stem)
+        return ConcoursParser.build(path.stem, ConcoursParser.read(path))
+
+    @staticmethod
+    def read(path: Path) -> dict[str, list[tuple]]:
         wb = openpyxl.load_workbook(path)
+        return {name: list(wb[name].iter_rows(values_only=True)) for name in CONCOURS_SHEETS if name in wb.sheetnames}
 
-        ConcoursParser.parse_rooms(c, wb)
-        # ConcoursParser.parse_volunteers(c, wb)
-        ConcoursParser.parse_participants(c, wb)
+    @staticmethod
+    def build(name: str, sheets: dict[str, list[tuple]]) -> Concours:
+        c = Concours(name)
+
+        ConcoursParser.parse_rooms(c, sheets['rooms'])
+        # ConcoursParser.parse_volunteers(c, sheets['volunteers'])
+        ConcoursParser.parse_participants(c, sheets['participants'])
 
         c.set_target_rs_duration()
+        c.build_indexes()
 
         return c
     
     @staticmethod
-    def parse_volunteers(c: Concours, wb: openpyxl.Workbook):
-        sheet = wb['volunteers']
-
+    def parse_volunteers(c: Concours, rows: list[tuple]):
         # TODO For now we'll ignore everything but name
 
-        rows = [r for r in sheet.rows][1:]
-        for row in rows:
-            last, first = (c.value.strip() for c in row[2:4])
+        for row in rows[1:]:
+            last, first = (v.strip() for v in row[2:4])
             vol = Volunteer(f'{first} {last}')
             c.volunteers.add(vol)
     
     @staticmethod
-    def parse_rooms(c: Concours, wb: openpyxl.Workbook):
-        sheet = wb['rooms']
-
+    def parse_rooms(c: Concours, rows: list[tuple]):
         periods = {}
         rooms = {}
 
-        rows = [r for r in sheet.rows][1:]
-        for row in rows:
-            period_id, room_id = (str(c.value).strip() for c in row)
+        for row in rows[1:]:
+            period_id, room_id = (str(v).strip() for v in row)
             
             period = periods.setdefault(period_id, Period(period_id))
             room = rooms.setdefault(room_id, Room(room_id))
@@ -54,10 +69,7 @@ class ConcoursParser:
             c.rooms.add(room)
 
     @staticmethod
-    def parse_participants(c: Concours, wb: openpyxl.Workbook):
-        sheet = wb['participants']
-        rows = [r for r in sheet.rows]
-
+    def parse_participants(c: Concours, rows: list[tuple]):
         # Use a list to preserve index for mapping contestants
         categories = []
 
@@ -65,8 +77,8 @@ class ConcoursParser:
         for (offset, prefix) in enumerate('TI'):
             start = 12 + (offset * 8)
             for col in range(start, start + 8):
-                cat_id = rows[1][col].value.replace('\n', ' ')
-                dur = int(rows[3][col].value)
+                cat_id = rows[1][col].replace('\n', ' ')
+                dur = int(rows[3][col])
 
                 grade, level = cat_id.split()
                 sformat, level = INPUT_SFORMAT_TO_FULL[prefix], INPUT_LEVEL_TO_FULL[level]
@@ -75,9 +87,7 @@ class ConcoursParser:
                 c.categories.add(cat)
         
         # Second iteration: schools, judges, participants
-        for row in rows[5:]:
-            cells = [c.value for c in row]
-
+        for cells in rows[5:]:
             if not cells[0]:
                 continue
 
@@ -100,78 +110,141 @@ class ConcoursParser:
                     c.contestants.add(contestant)
 
 class ScoreboardParser:
+    """Split into read and link, as with ConcoursParser."""
     
     @staticmethod
     def parse(path: Path, c: Concours):
         """Adds the scoreboard to the concours and vice-versa rather than returning."""
-        sb = Scoreboard(path.stem)
-        sb.concours = c
-        c.scoreboard = sb
+        ScoreboardParser.link(path.stem, ScoreboardParser.read(path), c)
 
+    @staticmethod
+    def read(path: Path) -> list[tuple]:
         # Ignore data validation warning
         with warnings.catch_warnings(action='ignore', category=UserWarning):
             wb = openpyxl.load_workbook(path)
 
-        ScoreboardParser.parse_evaluations(sb, wb)
+        return list(wb[EVALUATIONS_SHEET].iter_rows(values_only=True))
 
     @staticmethod
-    def parse_evaluations(sb: Scoreboard, wb: openpyxl.Workbook):
-        sheet = wb['Evaluations']
-        rows = [r for r in sheet.rows]
-        
+    def link(name: str, rows: list[tuple], c: Concours):
+        sb = Scoreboard(name)
+        sb.concours = c
+        c.scoreboard = sb
+
+        ScoreboardParser.parse_evaluations(sb, rows)
+
+    @staticmethod
+    def parse_evaluations(sb: Scoreboard, rows: list[tuple]) -> list[Evaluation]:
         speeches = {}
+        es = []
 
-        # Skip first 3
-        rows = rows[3:]
+        for row in ScoreboardParser.evaluation_rows(rows):
+            e = ScoreboardParser.parse_evaluation(sb, row, speeches)
+            sb.evaluations.add(e)
+            es.append(e)
 
-        for row in rows:
-            judge_name = row[0].value
-            if not judge_name:
-                break
+        return es
 
-            contestant_name = row[4].value
-            
-            judge = sb.concours.get_judge(judge_name)
-            contestant = sb.concours.get_contestant(contestant_name)
+    @staticmethod
+    def evaluation_rows(rows: list[tuple]) -> list[tuple]:
+        """The rows holding evaluations: after the first 3, up to the first without a judge."""
+        evaluation_rows = []
 
-            sformat = row[1].value
-            if sformat == SFORMAT_TRADITIONAL:
-                scores = tuple(c.value for c in row[11:16])
-                title = "" # TODO
+        # Skip first 3
+        for row in rows[3:]:
+            if not row[0]:
+                break
+            evaluation_rows.append(row)
 
-                speech = speeches.setdefault(contestant, TraditionalSpeech(contestant, title))
+        return evaluation_rows
 
+    @staticmethod
+    def parse_evaluation(sb: Scoreboard, row: tuple, speeches: dict[Contestant, Speech]) -> Evaluation:
+        judge_name = row[0]
+        contestant_name = row[4]
+        
+        judge = sb.concours.get_judge(judge_name)
+        contestant = sb.concours.get_contestant(contestant_name)
+
+        sformat = row[1]
+        if sformat == SFORMAT_TRADITIONAL:
+            scores = tuple(row[11:16])
+            title = "" # TODO
+
+            speech = speeches.setdefault(contestant, TraditionalSpeech(contestant, title))
+
+        else:
+            scores = tuple(row[17:22])
+            photo = row[5]
+            phrase = row[6]
+
+            if photo:
+                prompt_type = PROMPT_PHOTO
+                prompt = photo
+            elif phrase:
+                prompt_type = PROMPT_PHRASE
+                prompt = phrase
             else:
-                scores = tuple(c.value for c in row[17:22])
-                photo = row[5].value
-                phrase = row[6].value
-
-                if photo:
-                    prompt_type = PROMPT_PHOTO
-                    prompt = photo
-                elif phrase:
-                    prompt_type = PROMPT_PHRASE
-                    prompt = phrase
-                else:
-                    prompt_type = None
-                    prompt = None
-
-                speech = speeches.setdefault(contestant, ImpromptuSpeech(contestant, prompt_type, prompt))
-
-            duration_str = row[7].value
-            if duration_str:
-            # Reparse this garbage. It's supposed to be minute:second but Excel interpets it as hour:minute
-                duration_str = f'{duration_str.hour}:{duration_str.minute}'
-                speech.add_duration_from_str(duration_str)
-
-            # TODO Some judges gave no scores
-            if set(scores) == {None}:
-                scores = None
-
-            e = Evaluation(judge, speech, scores)
-
-            comments = row[8].value
-            if comments:
-                e.comments = comments
-            
-            sb.evaluations.add(e)
+                prompt_type = None
+                prompt = None
+
+            speech = speeches.setdefault(contestant, ImpromptuSpeech(contestant, prompt_type, prompt))
+
+        duration_str = row[7]
+        if duration_str:
+        # Reparse this garbage. It's supposed to be minute:second but Excel interpets it as hour:minute
+            duration_str = f'{duration_str.hour}:{duration_str.minute}'
+            speech.add_duration_from_str(duration_str)
+
+        # TODO Some judges gave no scores
+        if set(scores) == {None}:
+            scores = None
+
+        e = Evaluation(judge, speech, scores)
+
+        comments = row[8]
+        if comments:
+            e.comments = comments
+        
+        return e
+
+class ConcurrentParser:
+
+    @staticmethod
+    def parse(concours_path: Path, evaluations_path: Path) -> Concours:
+        """
+        Decode the two workbooks at the same time: concours.xlsx in a worker
+        process (openpyxl is CPU-bound, so threads would not help) and
+        evaluations.xlsx here. Linking waits for both. With a single core
+        there is nothing to overlap, so both are read here, one after the other.
+        """
+        if (os.cpu_count() or 1) < 2:
+            return ConcurrentParser.parse_sequential(concours_path, evaluations_path)
+
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            concours_sheets = pool.submit(ConcoursParser.read, concours_path)
+            evaluations_rows = ScoreboardParser.read(evaluations_path)
+
+            c = ConcoursParser.build(concours_path.stem, concours_sheets.result())
+
+        ScoreboardParser.link(evaluations_path.stem, evaluations_rows, c)
+        return c
+
+    @staticmethod
+    def parse_sequential(concours_path: Path, evaluations_path: Path) -> Concours:
+        c = ConcoursParser.parse(concours_path)
+        ScoreboardParser.parse(evaluations_path, c)
+        return c
+
+class TextConverter:
+
+    @staticmethod
+    def convert(concours_path: Path, evaluations_path: Path, out_dir: Path, suffix: str=SUFFIX_CSV):
+        """
+        Rewrite the xlsx inputs in the plain-text format (see textparser),
+        as out_dir/<concours>/ and out_dir/<evaluations><suffix>.
+        """
+        c = ConcoursParser.parse(concours_path)
+        ScoreboardParser.parse(evaluations_path, c)
+
+        TextWriter.write(c, out_dir / concours_path.stem, out_dir / f'{evaluations_path.stem}{suffix}', suffix)
@@ -0,0 +1,160 @@
+"""
+Where the time goes: named phases of the pipeline (parsing, scheduling,
+scorepads, saving...) timed by wall clock and CPU, with the peak memory each
+one reached, and optionally a cProfile dump per phase. Off by default, when
+phase() costs nothing; on with enable() (main.py --profile) or the
+CONCOURS_PROFILE environment variable:
+
+    CONCOURS_PROFILE=1          timings and memory (or true)
+    CONCOURS_PROFILE=cprofile   also a .prof per phase, in output/profile/
+
+Phases nest (e.g. run/report/create_scorepads) and repeat (e.g. in watch
+mode); the summary adds up each path's calls. Only the outermost phase being
+profiled gets a cProfile dump, as profilers cannot nest. Single-threaded:
+phases in worker processes are not seen.
+
+Memory is traced with tracemalloc while enabled, which slows Python down
+somewhat; compare timings with each other rather than with unprofiled runs.
+"""
+
+from __future__ import annotations
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+import cProfile
+import json
+import os
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:
+    # Not on Windows
+    resource = None
+
+ENV_PROFILE = 'CONCOURS_PROFILE'
+CPROFILE = 'cprofile'
+ENV_ON = ('1', 'true', CPROFILE) # Anything else (0, false, blank...) leaves profiling off
+
+PATH_BASE = Path('./src')
+PATH_PROFILE = PATH_BASE / 'output' / 'profile'
+
+MB = 1024 * 1024
+
+_enabled = False
+_cprofile = False
+_profiling = False
+
+# Open phases, innermost last, with the peak memory each has seen so far
+_stack: list[str] = []
+_peaks: list[int] = []
+
+# By phase path: calls, wall, cpu, peak and peak increase (bytes)
+_totals: dict[str, dict[str, float]] = {}
+
+def enable(cprofile: bool=False):
+    global _enabled, _cprofile
+    _enabled, _cprofile = True, cprofile
+
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+def enabled() -> bool:
+    return _enabled
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """
+    >>> with phase('save'):
+    ...     report.save()
+    """
+    global _profiling
+
+    if not _enabled:
+        yield
+        return
+
+    path = '/'.join(_stack + [name])
+
+    # Fold the parent's peak so far in before resetting it for this phase
+    (current, peak) = tracemalloc.get_traced_memory()
+    if _peaks:
+        _peaks[-1] = max(_peaks[-1], peak)
+    tracemalloc.reset_peak()
+
+    _stack.append(name)
+    _peaks.append(current)
+
+    # Added on entry so that the summary lists parents before children
+    totals = _totals.setdefault(path, {'calls': 0, 'wall': 0.0, 'cpu': 0.0, 'peak': 0, 'peak_increase': 0})
+
+    profile = None
+    if _cprofile and not _profiling:
+        profile, _profiling = cProfile.Profile(), True
+        profile.enable()
+
+    start_wall, start_cpu = time.perf_counter(), time.process_time()
+
+    try:
+        yield
+
+    finally:
+        wall, cpu = time.perf_counter() - start_wall, time.process_time() - start_cpu
+
+        if profile:
+            profile.disable()
+            _profiling = False
+
+            PATH_PROFILE.mkdir(parents=True, exist_ok=True)
+            profile.dump_stats(PATH_PROFILE / f'{path.replace("/", ".")}.prof')
+
+        peak = max(_peaks.pop(), tracemalloc.get_traced_memory()[1])
+        _stack.pop()
+        if _peaks:
+            _peaks[-1] = max(_peaks[-1], peak)
+        tracemalloc.reset_peak()
+
+        totals['calls'] += 1
+        totals['wall'] += wall
+        totals['cpu'] += cpu
+        totals['peak'] = max(totals['peak'], peak)
+        totals['peak_increase'] = max(totals['peak_increase'], peak - current)
+
+def summary() -> dict:
+    phases = [
+        {
+            'phase': path,
+            'calls': t['calls'],
+            'wall_s': round(t['wall'], 4),
+            'cpu_s': round(t['cpu'], 4),
+            'peak_mb': round(t['peak'] / MB, 2),
+            'peak_increase_mb': round(t['peak_increase'] / MB, 2),
+        }
+        for (path, t) in _totals.items()
+    ]
+
+    d = {'phases': phases}
+    if resource:
+        # KB on Linux, bytes on macOS
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        d['max_rss_mb'] = round(max_rss / (MB if os.uname().sysname == 'Darwin' else 1024), 2)
+
+    return d
+
+def write_summary(path: Path=None) -> Path:
+    path = path or PATH_PROFILE / 'summary.json'
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(summary(), f, indent=2)
+
+    return path
+
+def print_summary():
+    print(f'{"Phase":<40} {"Calls":>5} {"Wall (s)":>9} {"CPU (s)":>9} {"Peak (MB)":>10} {"+Peak (MB)":>10}')
+    for p in summary()['phases']:
+        print(f'{p["phase"]:<40} {p["calls"]:>5} {p["wall_s"]:>9.3f} {p["cpu_s"]:>9.3f} {p["peak_mb"]:>10.1f} {p["peak_increase_mb"]:>10.1f}')
+
+if os.environ.get(ENV_PROFILE, '').strip().lower() in ENV_ON:
+    enable(cprofile=os.environ[ENV_PROFILE].strip().lower() == CPROFILE)
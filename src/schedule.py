@@ -207,7 +207,8 @@ class ConcoursSchedule:
         """
         TODO Inefficient (can just store them when making a CS) but for now
         """
-        judges = self.c.judges
+        # A copy: subtracting in place would take the judges out of the concours
+        judges = self.c.judges.copy()
         for rs in self.rses:
             judges -= rs.judges
         return judges
@@ -0,0 +1,194 @@
+"""
+The schedule on paper: a ConcoursSchedule (see schedule.py) as a workbook,
+output/schedule_<concours>.xlsx, or as one CSV or JSON lines file per sheet,
+in output/schedule_<concours>/:
+
+    grid            period x room: the categories in each room, and for how long
+    running_order   every speaker, by category, with their projected start
+    judges          each judge's room (and categories) in every period
+    room_<room>     a room's running order across periods, with its judges
+
+Within a room, categories go in order (see Category.sort_terms) and speakers
+by name. Projected starts count each speaker's base duration plus
+TRANSITION_BW_SPEAKERS, and TRANSITION_BW_CATEGORIES between categories, as
+RoomSchedule.projected_duration does. They are given in minutes into the
+period, and as a time of day for periods whose start is known.
+
+The running order is worked out once; every sheet is then streamed from it,
+in write-only mode, so rows go to disk as they are made.
+"""
+
+from __future__ import annotations
+from typing import Iterator
+from pathlib import Path
+from concours import *
+from schedule import ConcoursSchedule, RoomSchedule
+from textparser import write_rows, SUFFIX_CSV, SUFFIX_JSONL
+from profiling import phase
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+import datetime
+import openpyxl
+import re
+
+PATH_BASE = Path('./src')
+PATH_OUTPUT = PATH_BASE / 'output'
+
+EXPORT_SUFFIXES = (SUFFIX_CSV, SUFFIX_JSONL)
+
+RUNNING_ORDER_FIELDS = ('category', 'period', 'room', 'order', 'offset', 'start', 'contestant', 'school')
+ROOM_FIELDS = ('period', 'offset', 'start', 'category', 'order', 'contestant', 'school', 'judges')
+
+# Excel's limits on sheet titles
+SHEET_TITLE_LENGTH = 31
+SHEET_TITLE_FORBIDDEN = re.compile(r'[\[\]:*?/\\]')
+
+HEADER_FONT = Font(bold=True)
+
+# A speaker's place: their room's schedule, their category, their position in
+# it (from 1), the minutes from the start of the period, and themselves
+Slot = tuple[RoomSchedule, Category, int, int, Contestant]
+
+def sheet_title(key: str) -> str:
+    return SHEET_TITLE_FORBIDDEN.sub('_', key)[:SHEET_TITLE_LENGTH]
+
+class ScheduleReport:
+    """
+    >>> ScheduleReport(sched, starts={'P1': datetime.time(9, 0)}).save()
+    """
+    schedule: ConcoursSchedule
+    starts: dict[str, datetime.time]
+
+    periods: list[Period]
+    rooms: list[Room]
+    rses: dict[tuple[Period, Room], RoomSchedule]
+    slots: list[Slot] # By period, room and start
+    room_to_slots: dict[Room, list[Slot]]
+
+    def __init__(self: ScheduleReport, schedule: ConcoursSchedule, starts: dict[str, datetime.time]=None):
+        """starts: the time each period starts, by period name, if known."""
+        self.schedule = schedule
+        self.starts = starts or {}
+
+        c = schedule.c
+        self.periods = sorted(c.periods, key=lambda p: p.name)
+        self.rooms = sorted(c.rooms, key=lambda r: r.name)
+        self.rses = {(rs.period, rs.room): rs for rs in schedule.rses}
+
+        self.slots, self.room_to_slots = [], {}
+        for key in sorted(self.rses, key=lambda key: (key[0].name, key[1].name)):
+            slots = self.room_slots(self.rses[key])
+            self.slots += slots
+            self.room_to_slots.setdefault(key[1], []).extend(slots)
+
+    @staticmethod
+    def room_slots(rs: RoomSchedule) -> list[Slot]:
+        slots = []
+        offset = 0
+
+        for cat in sorted(rs.categories):
+            for (i, cont) in enumerate(sorted(cat.contestants, key=lambda cont: cont.name)):
+                slots.append((rs, cat, i + 1, offset + i * (cat.base_duration + TRANSITION_BW_SPEAKERS), cont))
+
+            offset += cat.projected_duration() + TRANSITION_BW_CATEGORIES
+
+        return slots
+
+    def start(self: ScheduleReport, period: Period, offset: int) -> str|None:
+        """The time of day offset minutes into the period, if it has a start."""
+        if period.name not in self.starts:
+            return None
+
+        start = datetime.datetime.combine(datetime.date.min, self.starts[period.name])
+        return (start + datetime.timedelta(minutes=offset)).strftime('%H:%M')
+
+    @staticmethod
+    def judge_names(rs: RoomSchedule) -> str:
+        return ', '.join(sorted(j.name for j in rs.judges))
+
+    def tables(self: ScheduleReport) -> dict[str, tuple[tuple[str], Iterator]]:
+        """Each sheet's fields and (lazy) rows, by key."""
+        tables = {
+            'grid': (('period', *(room.name for room in self.rooms)), self.grid_rows()),
+            'running_order': (RUNNING_ORDER_FIELDS, self.running_order_rows()),
+            'judges': (('judge', 'school', *(period.name for period in self.periods)), self.judge_rows()),
+        }
+
+        for room in self.rooms:
+            tables[f'room_{room.name}'] = (ROOM_FIELDS, self.room_rows(room))
+
+        return tables
+
+    def grid_rows(self: ScheduleReport) -> Iterator[tuple]:
+        for period in self.periods:
+            row = [period.name]
+            for room in self.rooms:
+                rs = self.rses.get((period, room))
+                if rs and rs.categories:
+                    row.append(f'{", ".join(cat.shortname() for cat in sorted(rs.categories))} ({rs.projected_duration()} min)')
+                else:
+                    row.append(None)
+            yield tuple(row)
+
+    def running_order_rows(self: ScheduleReport) -> Iterator[tuple]:
+        for (rs, cat, order, offset, cont) in sorted(self.slots, key=lambda slot: (slot[1], slot[2])):
+            yield (
+                cat.shortname(), rs.period.name, rs.room.name, order, offset,
+                self.start(rs.period, offset), cont.name, cont.school.shortname
+            )
+
+    def room_rows(self: ScheduleReport, room: Room) -> Iterator[tuple]:
+        for (rs, cat, order, offset, cont) in self.room_to_slots.get(room, ()):
+            yield (
+                rs.period.name, offset, self.start(rs.period, offset), cat.shortname(), order,
+                cont.name, cont.school.shortname, self.judge_names(rs)
+            )
+
+    def judge_rows(self: ScheduleReport) -> Iterator[tuple]:
+        """One row per person; judges are repeated for each period (see ConcoursParser)."""
+        itineraries = {}
+        for judge in self.schedule.c.judges:
+            itineraries.setdefault((judge.name, judge.school.name), {})
+
+        for rs in self.rses.values():
+            where = rs.room.name
+            if rs.categories:
+                where += f' ({", ".join(cat.shortname() for cat in sorted(rs.categories))})'
+            for judge in rs.judges:
+                itineraries[(judge.name, judge.school.name)][rs.period] = where
+
+        for ((name, school), itinerary) in sorted(itineraries.items()):
+            yield (name, school, *(itinerary.get(period) for period in self.periods))
+
+    @phase('save_schedule')
+    def save(self: ScheduleReport, directory: Path=None) -> Path:
+        """As output/schedule_<concours>.xlsx by default."""
+        wb = openpyxl.Workbook(write_only=True)
+
+        for (key, (fields, rows)) in self.tables().items():
+            ws = wb.create_sheet(sheet_title(key))
+            ws.append([self.header_cell(ws, field) for field in fields])
+            for row in rows:
+                ws.append(row)
+
+        path = (directory or PATH_OUTPUT) / f'schedule_{self.schedule.c.name}.xlsx'
+        path.parent.mkdir(parents=True, exist_ok=True)
+        wb.save(path)
+        return path
+
+    def export(self: ScheduleReport, suffix: str=SUFFIX_CSV, directory: Path=None):
+        """One file per sheet, in output/schedule_<concours>/ by default."""
+        if suffix not in EXPORT_SUFFIXES:
+            raise ValueError(f'Cannot export to {suffix}; use one of {", ".join(EXPORT_SUFFIXES)}')
+
+        directory = directory or PATH_OUTPUT / f'schedule_{self.schedule.c.name}'
+        directory.mkdir(parents=True, exist_ok=True)
+
+        for (key, (fields, rows)) in self.tables().items():
+            write_rows(directory / f'{sheet_title(key)}{suffix}', fields, rows)
+
+    @staticmethod
+    def header_cell(ws, value: object) -> WriteOnlyCell:
+        cell = WriteOnlyCell(ws, value)
+        cell.font = HEADER_FONT
+        return cell
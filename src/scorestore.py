@@ -0,0 +1,140 @@
+from __future__ import annotations
+from typing import Iterable
+from concours import *
+import numpy as np
+
+PERIOD_ANY = ''
+
+N_CRITERIA = 5
+
+# Utilities
+
+def judge_any_period(judge: Judge) -> Judge:
+    """Hackish solution to judges being repeated per period: one key for all."""
+    return Judge(judge.name, judge.school, PERIOD_ANY)
+
+def duration_bucket(e: Evaluation) -> int:
+    """Bucket by # of minutes."""
+    return round(e.speech.duration / 60)
+
+def split_by_code(codes: np.ndarray, n_codes: int) -> list[np.ndarray]:
+    """The indices holding each code, from 0 to n_codes - 1."""
+    order = np.argsort(codes, kind='stable')
+    counts = np.bincount(codes, minlength=n_codes)
+    return np.split(order, np.cumsum(counts)[:-1])
+
+# What each evaluation is grouped by, and how to get it
+KEY_TO_GETTER = {
+    'judge': lambda e: judge_any_period(e.judge),
+    'contestant': lambda e: e.contestant,
+    'category': lambda e: e.category,
+    'judge_school': lambda e: e.judge.school,
+    'contestant_school': lambda e: e.contestant.school,
+    'sformat': lambda e: e.sformat,
+    'grade': lambda e: e.grade,
+    'level': lambda e: e.level,
+    'duration': duration_bucket,
+}
+
+KEYS = tuple(KEY_TO_GETTER)
+
+class ScoreStore:
+    """
+    Columnar copy of scored evaluations: row i holds evaluations[i], its scores
+    in scores[i] and, for each key, the code of its item in column(key), where
+    items[key][code] is the item itself (a judge, a category, a bucket...).
+
+    Rows are only ever appended, so codes and row numbers stay valid.
+    """
+    n: int
+    items: dict[str, list]
+    item_to_code: dict[str, dict[object, int]]
+
+    _scores: np.ndarray
+    _codes: dict[str, np.ndarray]
+    _evaluations: np.ndarray
+
+    def __init__(self: ScoreStore, capacity: int=0):
+        self.n = 0
+        self.items = {key: [] for key in KEYS}
+        self.item_to_code = {key: {} for key in KEYS}
+
+        self._scores = np.empty((capacity, N_CRITERIA))
+        self._codes = {key: np.empty(capacity, dtype=np.intp) for key in KEYS}
+        self._evaluations = np.empty(capacity, dtype=object)
+
+    @staticmethod
+    def from_evaluations(es: Iterable[Evaluation]) -> ScoreStore:
+        es = list(es)
+        store = ScoreStore(len(es))
+
+        for e in es:
+            store.append(e)
+
+        return store
+
+    @property
+    def scores(self: ScoreStore) -> np.ndarray:
+        return self._scores[:self.n]
+
+    @property
+    def evaluations(self: ScoreStore) -> np.ndarray:
+        return self._evaluations[:self.n]
+
+    def column(self: ScoreStore, key: str) -> np.ndarray:
+        return self._codes[key][:self.n]
+
+    def code(self: ScoreStore, key: str, item: object) -> int:
+        """The item's code, assigning the next one if it is new."""
+        codes = self.item_to_code[key]
+        if item not in codes:
+            codes[item] = len(self.items[key])
+            self.items[key].append(item)
+
+        return codes[item]
+
+    def code_of(self: ScoreStore, key: str, item: object) -> int|None:
+        return self.item_to_code[key].get(item)
+
+    def rows_where(self: ScoreStore, key: str, item: object) -> np.ndarray:
+        code = self.code_of(key, item)
+        if code is None:
+            return np.empty(0, dtype=np.intp)
+
+        return np.flatnonzero(self.column(key) == code)
+
+    def groups(self: ScoreStore, key: str) -> dict[object, np.ndarray]:
+        """
+        The rows of every item for this key at once: one stable sort of the
+        codes, cut where they change. Rows stay in order within each item.
+        """
+        return dict(zip(self.items[key], split_by_code(self.column(key), len(self.items[key]))))
+
+    def subgroups(self: ScoreStore, key: str, subkey: str) -> dict[tuple[object, object], np.ndarray]:
+        """As groups, but by (item, subitem) pairs: e.g. each judge's rows per format."""
+        n_sub = len(self.items[subkey])
+        codes = (self.column(key) * n_sub) + self.column(subkey)
+
+        pairs = ((item, sub) for item in self.items[key] for sub in self.items[subkey])
+        return dict(zip(pairs, split_by_code(codes, len(self.items[key]) * n_sub)))
+
+    def append(self: ScoreStore, e: Evaluation) -> int:
+        """Add a scored evaluation and return its row."""
+        if self.n == len(self._scores):
+            self._grow(max(16, 2 * self.n))
+
+        row = self.n
+        self._scores[row] = [np.nan if s is None else s for s in e.scores]
+        self._evaluations[row] = e
+
+        for (key, getter) in KEY_TO_GETTER.items():
+            self._codes[key][row] = self.code(key, getter(e))
+
+        self.n += 1
+        return row
+
+    def _grow(self: ScoreStore, capacity: int):
+        self._scores = np.resize(self._scores, (capacity, N_CRITERIA))
+        self._evaluations = np.resize(self._evaluations, capacity)
+        for key in KEYS:
+            self._codes[key] = np.resize(self._codes[key], capacity)
@@ -0,0 +1,269 @@
+"""
+Live results for results night: a small HTTP server (asyncio, standard
+library only) around a ConcoursReport that takes new evaluations as they are
+entered and pushes each update to every browser.
+
+    GET  /               the places, refreshed on every update
+    GET  /tables         the names of the tables
+    GET  /tables/<name>  a table as JSON: version, fields and rows (see ConcoursReport.tables)
+    GET  /events         server-sent events: an update per batch of new evaluations
+    POST /evaluations    new evaluations, as JSON lines or a JSON list of objects,
+                         with the columns of the evaluations file (see textparser)
+
+Errors are JSON too: {"error": message}, with a 4xx status.
+
+New evaluations only touch the scorepads and places they belong to (see
+ConcoursReport.add_evaluations). Tables are rendered to JSON once per update,
+on first request, and served from memory after that, so that hundreds of
+viewers cost one render rather than hundreds. With a ScoreboardTail on a
+file, the file is also polled for new lines.
+
+Only this machine can connect by default. Anyone who can connect can POST
+evaluations, as there is no authentication, so only listen on every interface
+(host 0.0.0.0) on a network you trust.
+"""
+
+from __future__ import annotations
+from typing import Iterable
+from concours import *
+from evaluations import ConcoursReport
+from textparser import ScoreboardTail
+import asyncio
+import json
+
+HOST = '127.0.0.1'
+PORT = 8000
+
+POLL_INTERVAL = 1 # Seconds between polls of the followed file
+KEEPALIVE = 15 # Seconds of quiet before a comment is sent to each viewer
+CLIENT_QUEUE = 16 # Updates held for a slow viewer before skipping some
+MAX_BODY = 16 * 1024 * 1024
+
+STATUS_TEXT = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 413: 'Payload Too Large'}
+
+PAGE = '''<!DOCTYPE html>
+<html>
+<head><meta charset="utf-8"><title>Places</title>
+<style>body { font-family: sans-serif; } td, th { padding: 2px 8px; text-align: left; }</style>
+</head>
+<body>
+<h1>Places <small id="version"></small></h1>
+<table id="places"></table>
+<script>
+async function refresh() {
+    const table = await (await fetch('/tables/places')).json();
+    document.getElementById('version').textContent = '#' + table.version;
+    const head = '<tr>' + table.fields.map(f => '<th>' + f + '</th>').join('') + '</tr>';
+    const rows = table.rows.map(r => '<tr>' + r.map(v => '<td>' + v + '</td>').join('') + '</tr>');
+    document.getElementById('places').innerHTML = head + rows.join('');
+}
+new EventSource('/events').addEventListener('update', refresh);
+refresh();
+</script>
+</body>
+</html>
+'''
+
+class LiveServer:
+    report: ConcoursReport
+    tail: ScoreboardTail
+    host: str
+    port: int
+    version: int
+    rewinds: int # The tail's, as of the report
+
+    _cache: dict[str, bytes]
+    _viewers: set[asyncio.Queue]
+
+    def __init__(self: LiveServer, report: ConcoursReport, tail: ScoreboardTail=None, host: str=HOST, port: int=PORT):
+        """Without a tail, evaluations only come in by POST."""
+        self.report = report
+        self.tail = tail or ScoreboardTail(None, report.c.scoreboard)
+        self.host, self.port = host, port
+        self.version = 0
+        self.rewinds = self.tail.rewinds
+
+        self._cache = {}
+        self._viewers = set()
+
+    def run(self: LiveServer):
+        asyncio.run(self.serve())
+
+    async def serve(self: LiveServer):
+        server = await asyncio.start_server(self.handle, self.host, self.port)
+        print(f'Serving {self.report.c.name} on http://{self.host}:{self.port}/')
+
+        if self.tail.path:
+            asyncio.get_running_loop().create_task(self.follow())
+
+        async with server:
+            await server.serve_forever()
+
+    async def follow(self: LiveServer):
+        while True:
+            await asyncio.sleep(POLL_INTERVAL)
+            try:
+                es = self.tail.poll()
+            except (OSError, ValueError) as e:
+                print(f'Could not read {self.tail.path}: {e}')
+                es = []
+
+            # The file was rewritten, and evaluations taken off the scoreboard
+            if self.tail.rewinds != self.rewinds:
+                self.rebuild()
+            else:
+                self.apply(es)
+
+    def ingest(self: LiveServer, rows: Iterable[dict]) -> list[Evaluation]:
+        """All or nothing (see ScoreboardTail.add_rows), so the report never lags the scoreboard."""
+        es = self.tail.add_rows(rows)
+        self.apply(es)
+        return es
+
+    def apply(self: LiveServer, es: list[Evaluation]):
+        """Fold evaluations (already on the scoreboard) into the report, then tell everyone."""
+        if not es:
+            return
+
+        self.report.add_evaluations(es)
+        self.updated(len(es), set(e.category for e in es))
+
+    def rebuild(self: LiveServer):
+        """The report again from the whole scoreboard, with the same sections."""
+        report = self.report
+        self.report = ConcoursReport(
+            report.c, severity=bool(report.severity), agreement=bool(report.agreement), bootstrap=report.bootstrap,
+            workers=report.workers
+        )
+        self.rewinds = self.tail.rewinds
+        self.updated(len(report.c.scoreboard.evaluations), report.c.categories)
+
+    def updated(self: LiveServer, evaluations: int, cats: set[Category]):
+        self.version += 1
+        self._cache.clear()
+        self.broadcast({'version': self.version, 'evaluations': evaluations, 'categories': [str(cat) for cat in sorted(cats)]})
+
+    def broadcast(self: LiveServer, data: dict):
+        message = f'event: update\ndata: {json.dumps(data)}\n\n'.encode()
+
+        for queue in self._viewers:
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # Each update means "fetch again", so a lagging viewer loses nothing
+                pass
+
+    def table_json(self: LiveServer, name: str) -> bytes|None:
+        if name not in self._cache:
+            tables = self.report.tables()
+            if name not in tables:
+                return None
+
+            (fields, rows) = tables[name]
+            self._cache[name] = json.dumps({'version': self.version, 'fields': fields, 'rows': list(rows)}).encode()
+
+        return self._cache[name]
+
+    async def handle(self: LiveServer, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            (method, path, headers) = await self.read_head(reader)
+
+            if path == '/events' and method == 'GET':
+                await self.stream_events(writer)
+                return
+
+            (status, body, content_type) = await self.route(method, path, headers, reader)
+            await self.respond(writer, status, body, content_type)
+
+        except (ValueError, asyncio.IncompleteReadError) as e:
+            await self.respond(writer, *self.error(400, str(e)))
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def route(self: LiveServer, method: str, path: str, headers: dict[str, str],
+                    reader: asyncio.StreamReader) -> tuple[int, bytes, str]:
+        if method == 'GET':
+            if path == '/':
+                return 200, PAGE.encode(), 'text/html; charset=utf-8'
+
+            if path == '/tables':
+                return 200, json.dumps(list(self.report.tables())).encode(), 'application/json'
+
+            if path.startswith('/tables/'):
+                body = self.table_json(path.removeprefix('/tables/'))
+                if body is None:
+                    return self.error(404, 'No such table')
+                return 200, body, 'application/json'
+
+            return self.error(404, 'Not found')
+
+        if method == 'POST' and path == '/evaluations':
+            length = headers.get('content-length', '0')
+            if not length.isdecimal():
+                return self.error(400, 'Content-Length must be a number of bytes')
+
+            length = int(length)
+            if length > MAX_BODY:
+                return self.error(413, 'Too many evaluations at once')
+
+            text = (await reader.readexactly(length)).decode('utf-8-sig').strip()
+            rows = json.loads(text) if text.startswith('[') else [json.loads(line) for line in text.splitlines() if line.strip()]
+
+            es = self.ingest(rows)
+            return 200, json.dumps({'version': self.version, 'added': len(es)}).encode(), 'application/json'
+
+        return self.error(405, 'Method not allowed')
+
+    @staticmethod
+    def error(status: int, message: str) -> tuple[int, bytes, str]:
+        return status, json.dumps({'error': message}).encode(), 'application/json'
+
+    async def stream_events(self: LiveServer, writer: asyncio.StreamWriter):
+        queue = asyncio.Queue(CLIENT_QUEUE)
+        self._viewers.add(queue)
+
+        try:
+            writer.write(
+                b'HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nCache-Control: no-cache\r\n'
+                b'Connection: keep-alive\r\n\r\n'
+            )
+            writer.write(f'event: hello\ndata: {json.dumps({"version": self.version})}\n\n'.encode())
+            await writer.drain()
+
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), KEEPALIVE)
+                except asyncio.TimeoutError:
+                    message = b': keepalive\n\n'
+
+                writer.write(message)
+                await writer.drain()
+
+        finally:
+            self._viewers.discard(queue)
+
+    @staticmethod
+    async def read_head(reader: asyncio.StreamReader) -> tuple[str, str, dict[str, str]]:
+        (method, target, _) = (await reader.readline()).decode('latin-1').split(' ', 2)
+        headers = {}
+
+        while (line := await reader.readline()) not in (b'\r\n', b'\n', b''):
+            (key, _, value) = line.decode('latin-1').partition(':')
+            headers[key.strip().lower()] = value.strip()
+
+        return method.upper(), target.split('?', 1)[0], headers
+
+    @staticmethod
+    async def respond(writer: asyncio.StreamWriter, status: int, body: bytes, content_type: str):
+        writer.write(
+            f'HTTP/1.1 {status} {STATUS_TEXT[status]}\r\nContent-Type: {content_type}\r\n'
+            f'Content-Length: {len(body)}\r\nCache-Control: no-cache\r\nConnection: close\r\n\r\n'.encode()
+        )
+        writer.write(body)
+
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
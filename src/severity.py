@@ -0,0 +1,81 @@
+"""
+Judge severity: an additive model of every score in the store,
+
+    score = criterion + contestant + judge + error
+
+fit by least squares. The judge effect is how much more (or less) a judge
+gives than the other judges of the same contestants; subtracting it is the
+judge-adjusted score.
+
+The design matrix is one indicator per criterion, contestant and judge,
+which is sparse and makes the normal equations block-diagonal within each
+factor. It is solved by backfitting (block Gauss-Seidel): each factor in turn
+is set to the mean residual of its scores given the other two, a bincount
+over all scores at once. Judge effects are centred (weighted by their
+number of scores) so that, over all scores, adjusting does not move the mean.
+"""
+
+from __future__ import annotations
+from scorestore import *
+import numpy as np
+
+# Backfitting stops when no effect moves by more than this, or after MAX_ITERATIONS
+TOLERANCE = 1e-6
+MAX_ITERATIONS = 1000
+
+class SeverityModel:
+    store: ScoreStore
+    criterion_effects: np.ndarray # By criterion
+    contestant_effects: np.ndarray # By contestant code in the store
+    judge_effects: np.ndarray # By judge code in the store
+    iterations: int
+
+    def __init__(self: SeverityModel, store: ScoreStore):
+        self.store = store
+        self.fit()
+
+    def fit(self: SeverityModel):
+        """(Re)fit on every row currently in the store."""
+        store = self.store
+        scores = store.scores
+        n_contestants = len(store.items['contestant'])
+        n_judges = len(store.items['judge'])
+
+        # One entry per score present: its value and the codes it belongs to
+        present = ~np.isnan(scores)
+        (rows, ks) = np.nonzero(present)
+        y = scores[present]
+        cs = store.column('contestant')[rows]
+        js = store.column('judge')[rows]
+
+        n_k = np.bincount(ks, minlength=N_CRITERIA)
+        n_c = np.bincount(cs, minlength=n_contestants)
+        n_j = np.bincount(js, minlength=n_judges)
+
+        # Factors with no scores keep an effect of 0
+        mu = np.bincount(ks, y, N_CRITERIA) / np.maximum(n_k, 1)
+        a = np.zeros(n_contestants)
+        b = np.zeros(n_judges)
+
+        for i in range(MAX_ITERATIONS):
+            a_new = np.bincount(cs, y - mu[ks] - b[js], n_contestants) / np.maximum(n_c, 1)
+            b_new = np.bincount(js, y - mu[ks] - a_new[cs], n_judges) / np.maximum(n_j, 1)
+            b_new -= (b_new * n_j).sum() / max(n_j.sum(), 1)
+            mu_new = np.bincount(ks, y - a_new[cs] - b_new[js], N_CRITERIA) / np.maximum(n_k, 1)
+
+            delta = max(np.abs(a_new - a).max(initial=0), np.abs(b_new - b).max(initial=0), np.abs(mu_new - mu).max())
+            (a, b, mu) = (a_new, b_new, mu_new)
+
+            if delta < TOLERANCE:
+                break
+
+        self.criterion_effects, self.contestant_effects, self.judge_effects = mu, a, b
+        self.iterations = i + 1
+
+    def judge_offsets(self: SeverityModel) -> np.ndarray:
+        """Each judge's effect on every criterion, by judge code: offsets for Scorepad.adjust_to."""
+        return np.repeat(self.judge_effects[:, np.newaxis], N_CRITERIA, axis=1)
+
+    def judge_to_effect(self: SeverityModel) -> dict[Judge, float]:
+        """Per criterion: a judge with 0.5 gives half a point more than the others, on each."""
+        return dict(zip(self.store.items['judge'], (float(b) for b in self.judge_effects)))
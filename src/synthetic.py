@@ -0,0 +1,170 @@
+"""
+Synthetic inputs, for benchmarks (see benchmark.py) and for trying things out
+without a real concours: concours.xlsx and evaluations.xlsx in the layouts
+ConcoursParser and ScoreboardParser read, at any scale, the same for the same
+seed.
+
+Every school fills some of its 16 category slots (one contestant each, as in
+the participants sheet) and sends some judges, who judge each period. Each
+speech is judged by judges from other schools; their scores are drawn around
+the contestant's skill, shifted by the judge's severity, so the report has
+something to find. A few evaluations have no scores, and judges are named by
+last name only about half the time, as in real evaluations files.
+"""
+
+from __future__ import annotations
+from pathlib import Path
+from concours import *
+from parser import EVALUATIONS_SHEET, SFORMAT_TRADITIONAL, SFORMAT_IMPROMPTU
+import datetime
+import openpyxl
+import random
+
+SCHOOLS = 12
+CONTESTANTS_PER_SCHOOL = 10 # Of the 16 category slots
+JUDGES_PER_SCHOOL = 2
+JUDGES_PER_SPEECH = 3
+PERIODS = 3
+ROOMS = 6
+SEED = 0
+
+MISSING_RATE = 0.03 # Evaluations without scores
+COMMENT_RATE = 0.2
+LAST_NAME_RATE = 0.5 # Evaluations naming the judge by last name only
+
+# Base durations (minutes) drawn from, by input prefix
+PREFIX_TO_DURATIONS = {'T': (3, 4, 5), 'I': (2,)}
+
+FIRST_NAMES = ('Alex', 'Camille', 'Élodie', 'Gabriel', 'Jade', 'Louis', 'Maëlle', 'Noah', 'Sacha', 'Zoé')
+LAST_NAMES = ('Bélanger', 'Côté', 'Gagnon', 'Lefèvre', 'Martin', 'Morin', 'Ouellet', 'Roy', 'Tremblay', 'Voisin')
+
+# Columns of the participants sheet (see ConcoursParser.parse_participants)
+PARTICIPANTS_WIDTH = 28
+PARTICIPANTS_FIRST_SLOT = 12
+PARTICIPANTS_HEADER_ROWS = 5
+
+# Columns of the evaluations sheet (see ScoreboardParser.parse_evaluation)
+EVALUATIONS_WIDTH = 22
+EVALUATIONS_HEADER_ROWS = 3
+
+class SyntheticConcours:
+    """
+    >>> SyntheticConcours(schools=150).write(Path('concours.xlsx'), Path('evaluations.xlsx'))
+    """
+    n_periods: int
+    n_rooms: int
+    judges_per_speech: int
+
+    rnd: random.Random
+    slots: list[tuple[str, str, int]] # Input header, prefix, base duration
+    schools: list[tuple[str, str, list[str], dict[int, str]]] # Name, shortname, judges, contestants by slot
+
+    def __init__(self: SyntheticConcours, schools: int=SCHOOLS, contestants_per_school: int=CONTESTANTS_PER_SCHOOL,
+                 judges_per_school: int=JUDGES_PER_SCHOOL, judges_per_speech: int=JUDGES_PER_SPEECH,
+                 periods: int=PERIODS, rooms: int=ROOMS, seed: int=SEED):
+        self.n_periods, self.n_rooms = periods, rooms
+        self.judges_per_speech = judges_per_speech
+        self.rnd = random.Random(seed)
+
+        # Slots in the order of the participants sheet: T then I, by grade then level
+        levels = list(INPUT_LEVEL_TO_FULL)
+        self.slots = [
+            (f'{grade}\n{level}', prefix, self.rnd.choice(PREFIX_TO_DURATIONS[prefix]))
+            for prefix in INPUT_SFORMAT_TO_FULL for grade in GRADES for level in levels
+        ]
+
+        n_slots = len(self.slots)
+        self.schools = []
+        n_judges = n_contestants = 0
+
+        for i in range(schools):
+            judges = [self.name(n_judges + j) for j in range(judges_per_school)]
+            n_judges += judges_per_school
+
+            slots = sorted(self.rnd.sample(range(n_slots), min(contestants_per_school, n_slots)))
+            contestants = {slot: self.name(n_contestants + j) for (j, slot) in enumerate(slots)}
+            n_contestants += len(slots)
+
+            self.schools.append((f'École {i + 1}', f'S{i + 1:03}', judges, contestants))
+
+    @staticmethod
+    def name(n: int) -> str:
+        """Unique, last names included, so judges can be found by last name alone."""
+        return f'{FIRST_NAMES[n % len(FIRST_NAMES)]} {LAST_NAMES[(n // len(FIRST_NAMES)) % len(LAST_NAMES)]}{n + 1}'
+
+    def write(self: SyntheticConcours, concours_path: Path, evaluations_path: Path):
+        concours_path.parent.mkdir(parents=True, exist_ok=True)
+        evaluations_path.parent.mkdir(parents=True, exist_ok=True)
+
+        wb = openpyxl.Workbook(write_only=True)
+        for (title, rows) in self.concours_sheets().items():
+            ws = wb.create_sheet(title)
+            for row in rows:
+                ws.append(row)
+        wb.save(concours_path)
+
+        wb = openpyxl.Workbook(write_only=True)
+        ws = wb.create_sheet(EVALUATIONS_SHEET)
+        for row in self.evaluation_rows():
+            ws.append(row)
+        wb.save(evaluations_path)
+
+    def concours_sheets(self: SyntheticConcours) -> dict[str, list[tuple]]:
+        rooms = [('Period', 'Room')] + [
+            (f'P{p + 1}', str(101 + r)) for p in range(self.n_periods) for r in range(self.n_rooms)
+        ]
+
+        header = [[None] * PARTICIPANTS_WIDTH for _ in range(PARTICIPANTS_HEADER_ROWS)]
+        header[0][0], header[0][1], header[0][11] = 'School', 'Shortname', 'Judges'
+        for (i, (cat_id, _, duration)) in enumerate(self.slots):
+            header[1][PARTICIPANTS_FIRST_SLOT + i] = cat_id
+            header[3][PARTICIPANTS_FIRST_SLOT + i] = duration
+
+        participants = [tuple(row) for row in header]
+        for (name, shortname, judges, contestants) in self.schools:
+            row = [None] * PARTICIPANTS_WIDTH
+            row[0], row[1], row[11] = name, shortname, ', '.join(judges)
+            for (slot, contestant) in contestants.items():
+                row[PARTICIPANTS_FIRST_SLOT + slot] = contestant
+            participants.append(tuple(row))
+
+        return {'rooms': rooms, 'participants': participants}
+
+    def evaluation_rows(self: SyntheticConcours) -> list[tuple]:
+        rnd = self.rnd
+        severity = {judge: rnd.gauss(0, 0.5) for (_, _, judges, _) in self.schools for judge in judges}
+
+        rows = [(f'Header {i + 1}',) for i in range(EVALUATIONS_HEADER_ROWS)]
+        for (_, _, own_judges, contestants) in self.schools:
+            others = [judge for judge in severity if judge not in own_judges]
+
+            for (slot, contestant) in contestants.items():
+                (_, prefix, base_duration) = self.slots[slot]
+                sformat = INPUT_SFORMAT_TO_FULL[prefix]
+                skill = rnd.gauss(7.5, 0.8)
+
+                # One speech, so one duration, whoever judges it; minutes:seconds
+                # read by Excel as hours:minutes, as the parser expects
+                seconds = max(30, int(rnd.gauss(base_duration * 60, 30)))
+                duration = datetime.time(seconds // 60, seconds % 60)
+
+                prompt = rnd.choice(((f'photo{slot}.jpg', None), (None, f'Phrase {slot}')))
+
+                for judge in rnd.sample(others, min(self.judges_per_speech, len(others))):
+                    row = [None] * EVALUATIONS_WIDTH
+                    row[0] = judge.split()[-1] if rnd.random() < LAST_NAME_RATE else judge
+                    row[1], row[4], row[7] = sformat, contestant, duration
+
+                    if sformat == SFORMAT_IMPROMPTU:
+                        row[5:7] = prompt
+                    if rnd.random() < COMMENT_RATE:
+                        row[8] = 'Bien'
+
+                    if rnd.random() >= MISSING_RATE:
+                        scores = [min(10, max(0, round(2 * rnd.gauss(skill + severity[judge], 0.7)) / 2)) for _ in range(5)]
+                        start = 11 if sformat == SFORMAT_TRADITIONAL else 17
+                        row[start:start + 5] = scores
+
+                    rows.append(tuple(row))
+
+        return rows
@@ -0,0 +1,401 @@
+"""
+Plain-text inputs: the same information as concours.xlsx and evaluations.xlsx,
+as CSV (with a header row) or JSON lines (one object per line, same keys).
+Only the standard library is used, and each file is read in a single pass.
+
+A concours is a directory (named like the concours) holding three files:
+
+    rooms         period, room
+    categories    sformat, grade, level, duration
+    participants  school, school_shortname, role, name, category
+
+sformat, grade and level are spelled out as in concours.py (e.g. Traditionnel,
+9/10, Cadre); duration is the base duration in minutes. role is 'judge' or
+'contestant', and category is the category's shortname (e.g. TJC) for
+contestants only. Rooms must list every period, since judges are repeated
+for each one, as with the xlsx.
+
+Evaluations are a single file:
+
+    evaluations   judge, contestant, sformat, prompt_type, prompt, duration,
+                  comments, score1, score2, score3, score4, score5
+
+judge may be a full or a last name, as in the xlsx. sformat may be left blank
+to use the contestant's category. duration is minutes:seconds. Blank scores
+are missing; a row with no scores at all is kept with scores None, as with
+the xlsx.
+"""
+
+from __future__ import annotations
+from typing import Iterable, Iterator
+from pathlib import Path
+from concours import *
+import csv
+import io
+import json
+
+SUFFIX_CSV = '.csv'
+SUFFIX_JSONL = '.jsonl'
+SUFFIXES = (SUFFIX_CSV, SUFFIX_JSONL)
+
+ROLE_JUDGE = 'judge'
+ROLE_CONTESTANT = 'contestant'
+
+ROOMS_FIELDS = ('period', 'room')
+CATEGORIES_FIELDS = ('sformat', 'grade', 'level', 'duration')
+PARTICIPANTS_FIELDS = ('school', 'school_shortname', 'role', 'name', 'category')
+EVALUATIONS_FIELDS = (
+    'judge', 'contestant', 'sformat', 'prompt_type', 'prompt', 'duration', 'comments',
+    'score1', 'score2', 'score3', 'score4', 'score5'
+)
+
+SCORE_FIELDS = EVALUATIONS_FIELDS[-5:]
+
+# Utilities
+
+def read_rows(path: Path) -> Iterator[dict]:
+    """Stream dicts from a CSV or JSON lines file, depending on its suffix."""
+    with open(path, encoding='utf-8-sig', newline='') as f:
+        if path.suffix == SUFFIX_JSONL:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from csv.DictReader(f)
+
+def write_rows(path: Path, fields: tuple[str], rows: Iterable[tuple]):
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        if path.suffix == SUFFIX_JSONL:
+            for row in rows:
+                f.write(json.dumps(dict(zip(fields, row)), ensure_ascii=False))
+                f.write('\n')
+        else:
+            writer = csv.writer(f)
+            writer.writerow(fields)
+            writer.writerows(rows)
+
+def find_file(directory: Path, stem: str) -> Path:
+    for suffix in SUFFIXES:
+        path = directory / f'{stem}{suffix}'
+        if path.exists():
+            return path
+
+    raise FileNotFoundError(f'No {stem}{"/".join(SUFFIXES)} in {directory}')
+
+def cell(row: dict, key: str) -> str:
+    """Blank and missing are the same; JSON values may not be strings."""
+    value = row.get(key)
+    return '' if value is None else str(value).strip()
+
+def parse_score(value: object) -> float|None:
+    if value is None or value == '':
+        return None
+
+    return float(value)
+
+def record_end(data: bytes, quoted: bool=False) -> int:
+    """
+    Length of data up to the end of its last complete line; with quoted (CSV),
+    a newline inside a quoted field does not end one.
+    """
+    if not quoted:
+        return data.rfind(b'\n') + 1
+
+    end = offset = quotes = 0
+    for line in data.split(b'\n')[:-1]:
+        offset += len(line) + 1
+        quotes += line.count(b'"')
+        if quotes % 2 == 0:
+            end = offset
+
+    return end
+
+def format_duration(seconds: int) -> str:
+    return f'{seconds // 60}{DURATION_SEPARATOR}{seconds % 60:02}'
+
+class ConcoursTextParser:
+
+    @staticmethod
+    def parse(path: Path) -> Concours:
+        """path is the concours directory."""
+        c = Concours(path.stem)
+
+        ConcoursTextParser.parse_rooms(c, read_rows(find_file(path, 'rooms')))
+        categories = ConcoursTextParser.parse_categories(c, read_rows(find_file(path, 'categories')))
+        ConcoursTextParser.parse_participants(c, read_rows(find_file(path, 'participants')), categories)
+
+        c.set_target_rs_duration()
+        c.build_indexes()
+
+        return c
+
+    @staticmethod
+    def parse_rooms(c: Concours, rows: Iterable[dict]):
+        periods = {}
+        rooms = {}
+
+        for row in rows:
+            period_id, room_id = cell(row, 'period'), cell(row, 'room')
+
+            period = periods.setdefault(period_id, Period(period_id))
+            room = rooms.setdefault(room_id, Room(room_id))
+
+            period.rooms.add(room)
+            room.periods.add(period)
+
+            c.periods.add(period)
+            c.rooms.add(room)
+
+    @staticmethod
+    def parse_categories(c: Concours, rows: Iterable[dict]) -> dict[str, Category]:
+        """Returns the categories by shortname, for mapping contestants."""
+        categories = {}
+
+        for row in rows:
+            cat = Category(cell(row, 'sformat'), cell(row, 'grade'), cell(row, 'level'), int(cell(row, 'duration')))
+            categories[cat.shortname()] = cat
+            c.categories.add(cat)
+
+        return categories
+
+    @staticmethod
+    def parse_participants(c: Concours, rows: Iterable[dict], categories: dict[str, Category]):
+        schools = {}
+
+        for row in rows:
+            name = cell(row, 'school')
+            if not name:
+                continue
+
+            school = schools.get(name)
+            if not school:
+                school = schools[name] = School(name, cell(row, 'school_shortname'))
+                c.schools.add(school)
+
+            role = cell(row, 'role').lower()
+            if role == ROLE_JUDGE:
+                for p in c.periods:
+                    judge = Judge(cell(row, 'name'), school, p)
+                    school.judges.add(judge)
+                    c.judges.add(judge)
+
+            elif role == ROLE_CONTESTANT:
+                cat = categories[cell(row, 'category')]
+                contestant = Contestant(cell(row, 'name'), school, cat)
+                school.contestants.add(contestant)
+                cat.contestants.add(contestant)
+                c.contestants.add(contestant)
+
+            else:
+                print(f'Unknown role {role} for {cell(row, "name")}')
+
+class ScoreboardTextParser:
+
+    @staticmethod
+    def parse(path: Path, c: Concours):
+        """Adds the scoreboard to the concours and vice-versa rather than returning."""
+        sb = Scoreboard(path.stem)
+        sb.concours = c
+        c.scoreboard = sb
+
+        ScoreboardTextParser.parse_evaluations(sb, read_rows(path))
+
+    @staticmethod
+    def parse_evaluations(sb: Scoreboard, rows: Iterable[dict]) -> list[Evaluation]:
+        speeches = {}
+        es = []
+
+        for row in rows:
+            e = ScoreboardTextParser.parse_evaluation(sb, row, speeches)
+            if e:
+                sb.evaluations.add(e)
+                es.append(e)
+
+        return es
+
+    @staticmethod
+    def parse_evaluation(sb: Scoreboard, row: dict, speeches: dict[Contestant, Speech]) -> Evaluation|None:
+        judge_name = cell(row, 'judge')
+        if not judge_name:
+            return None
+
+        judge = sb.concours.get_judge(judge_name)
+        contestant = sb.concours.get_contestant(cell(row, 'contestant'))
+
+        sformat = cell(row, 'sformat') or contestant.category.sformat
+        if contestant not in speeches:
+            if sformat == SFORMATS[0]:
+                speeches[contestant] = TraditionalSpeech(contestant, "")
+            else:
+                speeches[contestant] = ImpromptuSpeech(contestant, cell(row, 'prompt_type') or None, cell(row, 'prompt') or None)
+        speech = speeches[contestant]
+
+        duration_str = cell(row, 'duration')
+        if duration_str:
+            speech.add_duration_from_str(duration_str)
+
+        scores = tuple(parse_score(row.get(key)) for key in SCORE_FIELDS)
+        if set(scores) == {None}:
+            scores = None
+
+        e = Evaluation(judge, speech, scores)
+        e.comments = cell(row, 'comments')
+
+        return e
+
+class TextWriter:
+    """Writes a parsed concours (and its scoreboard) in the plain-text format."""
+
+    @staticmethod
+    def write(c: Concours, concours_dir: Path, evaluations_path: Path=None, suffix: str=SUFFIX_CSV):
+        concours_dir.mkdir(parents=True, exist_ok=True)
+
+        write_rows(concours_dir / f'rooms{suffix}', ROOMS_FIELDS, TextWriter.rooms_rows(c))
+        write_rows(concours_dir / f'categories{suffix}', CATEGORIES_FIELDS, TextWriter.categories_rows(c))
+        write_rows(concours_dir / f'participants{suffix}', PARTICIPANTS_FIELDS, TextWriter.participants_rows(c))
+
+        if evaluations_path and c.scoreboard:
+            write_rows(evaluations_path, EVALUATIONS_FIELDS, TextWriter.evaluations_rows(c.scoreboard))
+
+    @staticmethod
+    def rooms_rows(c: Concours) -> Iterator[tuple]:
+        for period in sorted(c.periods, key=lambda p: p.name):
+            for room in sorted(period.rooms, key=lambda r: r.name):
+                yield period.name, room.name
+
+    @staticmethod
+    def categories_rows(c: Concours) -> Iterator[tuple]:
+        for cat in sorted(c.categories):
+            yield cat.sformat, cat.grade, cat.level, cat.base_duration
+
+    @staticmethod
+    def participants_rows(c: Concours) -> Iterator[tuple]:
+        for school in sorted(c.schools, key=lambda s: s.name):
+            # Judges are repeated per period
+            for name in sorted(set(j.name for j in school.judges)):
+                yield school.name, school.shortname, ROLE_JUDGE, name, ''
+
+            for con in sorted(school.contestants, key=lambda con: con.name):
+                yield school.name, school.shortname, ROLE_CONTESTANT, con.name, con.category.shortname()
+
+    @staticmethod
+    def evaluations_rows(sb: Scoreboard) -> Iterator[tuple]:
+        def _terms(e: Evaluation) -> tuple[str]:
+            return e.contestant.name, e.judge.name if e.judge else ''
+
+        for e in sorted(sb.evaluations, key=_terms):
+            speech = e.speech
+            prompt_type = getattr(speech, 'prompt_type', None) or ''
+            prompt = getattr(speech, 'prompt', None) or ''
+            duration = format_duration(speech.duration) if speech.duration else ''
+            scores = e.scores or ('',) * 5
+
+            yield (
+                e.judge.name if e.judge else '', e.contestant.name, e.sformat,
+                prompt_type, prompt, duration, e.comments, *scores
+            )
+
+class ScoreboardTail:
+    """
+    Follows an evaluations file that is still being appended to (e.g. by score
+    entry during the event). Each poll parses only the complete records added
+    since the last one; feed the result to ConcoursReport.add_evaluations.
+
+    A poll is all or nothing: if any new row is bad, none are added and the
+    file is read from the same place next time, so fixing the row in the file
+    lets them all through. A file that shrinks was truncated or rewritten: what
+    came from it is taken off the scoreboard, the file is read again from the
+    start and rewinds is counted up, so whoever folded the old evaluations into
+    a report knows to rebuild it.
+    """
+    path: Path
+    sb: Scoreboard
+    position: int
+    fields: list[str]
+    speeches: dict[Contestant, Speech]
+    evaluations: list[Evaluation] # Those read from the file
+    rewinds: int
+
+    def __init__(self: ScoreboardTail, path: Path, sb: Scoreboard):
+        self.path, self.sb = path, sb
+        self.position = 0
+        self.fields = None
+        self.evaluations = []
+        self.rewinds = 0
+
+        # Continue the speeches already on the scoreboard
+        self.speeches = {e.contestant: e.speech for e in sb.evaluations}
+
+    @staticmethod
+    def follow(path: Path, c: Concours) -> ScoreboardTail:
+        """Like ScoreboardTextParser.parse, but keeps following the file afterwards."""
+        sb = Scoreboard(path.stem)
+        sb.concours = c
+        c.scoreboard = sb
+
+        tail = ScoreboardTail(path, sb)
+        tail.poll()
+        return tail
+
+    def poll(self: ScoreboardTail) -> list[Evaluation]:
+        if self.path.stat().st_size < self.position:
+            self.rewind()
+
+        with open(self.path, 'rb') as f:
+            f.seek(self.position)
+            data = f.read()
+
+        # Leave a partially written last record for next time
+        end = record_end(data, quoted=self.path.suffix != SUFFIX_JSONL)
+        if not end:
+            return []
+
+        text = data[:end].decode('utf-8-sig' if self.position == 0 else 'utf-8')
+        fields = self.fields
+
+        if self.path.suffix == SUFFIX_JSONL:
+            rows = [json.loads(line) for line in text.splitlines() if line.strip()]
+        else:
+            f = io.StringIO(text, newline='')
+            fields = fields or next(csv.reader(f))
+            rows = list(csv.DictReader(f, fieldnames=fields))
+
+        es = self.add_rows(rows)
+
+        self.position += end
+        self.fields = fields
+        self.evaluations += es
+        return es
+
+    def rewind(self: ScoreboardTail):
+        self.sb.evaluations.difference_update(self.evaluations)
+        self.speeches = {e.contestant: e.speech for e in self.sb.evaluations}
+
+        self.position, self.fields = 0, None
+        self.evaluations = []
+        self.rewinds += 1
+
+    def add_rows(self: ScoreboardTail, rows: Iterable[dict]) -> list[Evaluation]:
+        """
+        Also usable directly, for rows that come from somewhere other than the
+        file. All or nothing: a bad row raises ValueError before any is added.
+        """
+        speeches = dict(self.speeches)
+        es = []
+
+        for row in rows:
+            try:
+                e = ScoreboardTextParser.parse_evaluation(self.sb, row, speeches)
+            except (AttributeError, KeyError, TypeError, ValueError) as error:
+                raise ValueError(f'Bad evaluation {row}: {error}') from error
+
+            # The file parsers keep these, with None, as the xlsx does; live input is refused
+            if e and (e.judge is None or e.contestant is None):
+                raise ValueError(f'Bad evaluation {row}: unknown {"judge" if e.judge is None else "contestant"}')
+
+            if e:
+                es.append(e)
+
+        self.sb.evaluations.update(es)
+        self.speeches = speeches
+        return es
@@ -0,0 +1,231 @@
+"""
+Watch mode: keep the outputs current while the inputs are being edited (e.g.
+score entry saving evaluations.xlsx every few minutes).
+
+The inputs are polled; once a changed file has stopped changing (debounced,
+so that a save in progress is not read), only what depends on it is redone:
+
+    concours       everything: reparse, relink the evaluations, report,
+                   school reports and (if asked) the schedule and its workbook
+    evaluations    rows only added at the end are folded into the report
+                   (ConcoursReport.add_evaluations) and only the reports of
+                   schools with a contestant in their categories are
+                   rewritten; any other edit relinks the evaluations
+                   against the concours already parsed
+
+The xlsx and the plain-text inputs (see textparser) both work. An update
+that fails (a file saved mid-edit, or missing) leaves the last good report in
+place and is retried on the next change; outputs that could not be written
+(e.g. the workbook is open in Excel) are retried until they are.
+"""
+
+from __future__ import annotations
+from pathlib import Path
+from concours import *
+from parser import ConcoursParser, ScoreboardParser
+from textparser import ConcoursTextParser, ScoreboardTextParser, read_rows
+from schedule import ConcoursScheduler
+from schedulereport import ScheduleReport
+from evaluations import ConcoursReport
+from profiling import phase
+import time
+
+POLL_INTERVAL = 0.25 # Seconds between checks of the inputs
+DEBOUNCE = 0.75 # Seconds a changed input must stay unchanged before it is read
+RETRY_INTERVAL = 5 # Seconds between attempts to write outputs that could not be written
+
+def signature(path: Path) -> tuple|None:
+    """Size and mtime, of each file for a directory; None if missing."""
+    try:
+        if path.is_dir():
+            return tuple(sorted((p.name, p.stat().st_size, p.stat().st_mtime_ns) for p in path.iterdir() if p.is_file()))
+
+        st = path.stat()
+        return st.st_size, st.st_mtime_ns
+    except OSError:
+        return None
+
+class Watcher:
+    concours_path: Path
+    evaluations_path: Path
+    schedule: bool
+
+    c: Concours
+    report: ConcoursReport
+    rows: list # Evaluation rows, as last folded into the report; None to relink them all
+    speeches: dict[Contestant, Speech]
+    signatures: dict[Path, tuple]
+    unsaved: set[School]|None # Schools whose reports (and the workbook) are behind the report, if any
+    saved_at: float
+
+    def __init__(self: Watcher, concours_path: Path, evaluations_path: Path, schedule: bool=False):
+        """concours_path is concours.xlsx or a plain-text concours directory; likewise evaluations_path."""
+        self.concours_path, self.evaluations_path = concours_path, evaluations_path
+        self.schedule = schedule
+        self.signatures = {}
+
+        self.c = self.report = None
+        self.rows, self.speeches = None, {}
+        self.unsaved, self.saved_at = None, 0
+
+    def run(self: Watcher):
+        self.signatures = {path: signature(path) for path in self.paths()}
+        self.update(list(self.paths()))
+        print(f'Watching {", ".join(str(path) for path in self.paths())}')
+
+        while True:
+            time.sleep(POLL_INTERVAL)
+
+            changed = [path for path in self.paths() if signature(path) != self.signatures[path]]
+            if changed:
+                self.settle(changed)
+                self.update(changed)
+
+            elif self.unsaved is not None and time.monotonic() - self.saved_at >= RETRY_INTERVAL:
+                try:
+                    self.save()
+                    print('Outputs written')
+                except Exception as e:
+                    print(f'Could not write the outputs: {e!r}')
+
+    def paths(self: Watcher) -> tuple[Path, Path]:
+        return self.concours_path, self.evaluations_path
+
+    def settle(self: Watcher, paths: list[Path]):
+        """Wait until none of the paths has changed for DEBOUNCE seconds."""
+        last = [signature(path) for path in paths]
+        stable_since = time.monotonic()
+
+        while time.monotonic() - stable_since < DEBOUNCE:
+            time.sleep(POLL_INTERVAL)
+
+            current = [signature(path) for path in paths]
+            if current != last:
+                last, stable_since = current, time.monotonic()
+
+        for (path, sig) in zip(paths, last):
+            self.signatures[path] = sig
+
+    def update(self: Watcher, changed: list[Path]):
+        start = time.perf_counter()
+
+        try:
+            # Also until a first build succeeds (e.g. evaluations missing at startup)
+            if self.concours_path in changed or self.c is None:
+                self.rebuild()
+            else:
+                self.update_evaluations()
+        except Exception as e:
+            # Most likely saved mid-edit; the next save is read anyway
+            print(f'Could not update from {", ".join(str(path) for path in changed)}: {e!r}')
+            return
+
+        print(f'Updated in {time.perf_counter() - start:.2f}s')
+
+    def rebuild(self: Watcher):
+        if self.concours_path.is_dir():
+            c = ConcoursTextParser.parse(self.concours_path)
+        else:
+            c = ConcoursParser.parse(self.concours_path)
+
+        self.relink(self.read_evaluations(), c)
+
+        if self.schedule:
+            with phase('schedule'):
+                sched = ConcoursScheduler.create_valid_schedule(self.c)
+            if sched:
+                sched.pretty_print()
+                ScheduleReport(sched).save()
+            else:
+                print('Could not create a valid schedule.')
+
+    def update_evaluations(self: Watcher):
+        rows = self.read_evaluations()
+
+        if self.rows is None or len(rows) < len(self.rows) or rows[:len(self.rows)] != self.rows:
+            print('Evaluations edited: relinking')
+            self.relink(rows)
+            return
+
+        speeches = dict(self.speeches)
+        es = [e for e in (self.parse_evaluation(self.c.scoreboard, row, speeches) for row in rows[len(self.rows):]) if e]
+
+        if es:
+            print(f'{len(es)} new evaluations')
+            try:
+                self.c.scoreboard.evaluations.update(es)
+                self.report.add_evaluations(es)
+            except Exception:
+                # Perhaps partly folded in: relink every row next time
+                self.rows = None
+                raise
+
+            self.unsaved = (self.unsaved or set()) | self.affected_schools(es)
+
+        self.rows, self.speeches = rows, speeches
+        if self.unsaved is not None:
+            self.save()
+
+    def affected_schools(self: Watcher, es: list[Evaluation]) -> set[School]:
+        """
+        The schools whose reports the evaluations change: school reports are
+        adjusted to category, so every school with a contestant in one of
+        their categories. With severity or agreement, every school.
+        """
+        if self.report.severity or self.report.agreement:
+            return set(self.c.schools)
+
+        return {con.school for cat in {e.category for e in es} for con in cat.contestants}
+
+    def relink(self: Watcher, rows: list, c: Concours=None):
+        """
+        The scoreboard and report from every row, against c (by default the
+        concours already parsed); built aside and only swapped in once
+        complete, so that a failure leaves the last good state.
+        """
+        c = c or self.c
+
+        sb = Scoreboard(self.evaluations_path.stem)
+        sb.concours = c
+
+        speeches = {}
+        for row in rows:
+            e = self.parse_evaluation(sb, row, speeches)
+            if e:
+                sb.evaluations.add(e)
+
+        scoreboard, c.scoreboard = c.scoreboard, sb
+        try:
+            report = ConcoursReport(c)
+        except Exception:
+            c.scoreboard = scoreboard
+            raise
+
+        self.c, self.report = c, report
+        self.rows, self.speeches = rows, speeches
+        self.unsaved = set(c.schools)
+        self.save()
+
+    def save(self: Watcher):
+        """
+        The workbook and the school reports that are behind the report. If a
+        write fails (e.g. the workbook is open in Excel), they stay behind and
+        run tries again every RETRY_INTERVAL seconds.
+        """
+        self.saved_at = time.monotonic()
+
+        self.report.save()
+        self.report.save_school_reports(schools=self.unsaved)
+        self.unsaved = None
+
+    def read_evaluations(self: Watcher) -> list:
+        if self.evaluations_path.suffix == '.xlsx':
+            return ScoreboardParser.evaluation_rows(ScoreboardParser.read(self.evaluations_path))
+
+        return list(read_rows(self.evaluations_path))
+
+    def parse_evaluation(self: Watcher, sb: Scoreboard, row, speeches: dict[Contestant, Speech]) -> Evaluation|None:
+        if self.evaluations_path.suffix == '.xlsx':
+            return ScoreboardParser.parse_evaluation(sb, row, speeches)
+
+        return ScoreboardTextParser.parse_evaluation(sb, row, speeches)
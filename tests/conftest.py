@@ -0,0 +1,36 @@
+"""
+Shared fixtures. The modules in src/ import each other by bare name and read
+and write relative to ./src, so the tests put src/ on the path and run each
+test in a scratch directory laid out the same way.
+"""
+
+from pathlib import Path
+import sys
+
+import pytest
+
+PATH_REPO = Path(__file__).resolve().parent.parent
+PATH_SRC = PATH_REPO / 'src'
+
+sys.path.insert(0, str(PATH_SRC))
+
+from synthetic import SyntheticConcours
+
+@pytest.fixture
+def workdir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """A scratch directory with src/templates, src/input and src/output, as the current directory."""
+    (tmp_path / 'src' / 'input').mkdir(parents=True)
+    (tmp_path / 'src' / 'output').mkdir()
+    (tmp_path / 'src' / 'templates').symlink_to(PATH_SRC / 'templates')
+
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+@pytest.fixture
+def inputs(workdir: Path) -> tuple[Path, Path]:
+    """A small synthetic concours.xlsx and evaluations.xlsx, in src/input."""
+    concours_path = workdir / 'src' / 'input' / 'concours.xlsx'
+    evaluations_path = workdir / 'src' / 'input' / 'evaluations.xlsx'
+    SyntheticConcours(schools=6, contestants_per_school=6).write(concours_path, evaluations_path)
+
+    return concours_path, evaluations_path
@@ -0,0 +1,70 @@
+from concours import *
+from evaluations import ConcoursReport
+
+def build() -> Concours:
+    """Two schools, a category with a contestant from each, and three judges, two sharing a last name."""
+    c = Concours('test')
+    period = Period('P1')
+    c.periods.add(period)
+
+    cat = Category(SFORMATS[0], GRADES[0], LEVELS[0], 5)
+    c.categories.add(cat)
+
+    for (school_name, judge_names) in (('Alpha', ('Anne Roy', 'Marc Roy')), ('Beta', ('Paul Morin',))):
+        school = School(school_name, school_name[0])
+        c.schools.add(school)
+
+        for name in judge_names:
+            judge = Judge(name, school, period)
+            school.judges.add(judge)
+            c.judges.add(judge)
+
+        contestant = Contestant(f'Kid {school_name}', school, cat)
+        school.contestants.add(contestant)
+        cat.contestants.add(contestant)
+        c.contestants.add(contestant)
+
+    c.build_indexes()
+    return c
+
+def evaluate(c: Concours, judge_name: str, contestant_name: str, scores: tuple) -> Evaluation:
+    if c.scoreboard is None:
+        c.scoreboard = Scoreboard('evaluations')
+        c.scoreboard.concours = c
+
+    e = Evaluation(c.get_judge(judge_name), TraditionalSpeech(c.get_contestant(contestant_name), ''), scores)
+    c.scoreboard.evaluations.add(e)
+    return e
+
+def test_judge_by_full_name():
+    c = build()
+    assert c.get_judge('Anne Roy').name == 'Anne Roy'
+    assert c.get_judge('  Marc   Roy ').name == 'Marc Roy'
+
+def test_judge_by_unique_last_name():
+    assert build().get_judge('Morin').name == 'Paul Morin'
+
+def test_shared_last_name_is_ambiguous():
+    c = build()
+    assert 'Roy' in c.ambiguous_last_names
+    assert c.get_judge('Roy') is None
+
+def test_unknown_judge():
+    assert build().get_judge('Nobody') is None
+
+def test_report_leaves_out_unresolved_judges():
+    c = build()
+    evaluate(c, 'Paul Morin', 'Kid Alpha', (8, 8, 8, 8, 8))
+    evaluate(c, 'Anne Roy', 'Kid Beta', (6, 6, 6, 6, 6))
+    unresolved = evaluate(c, 'Roy', 'Kid Alpha', (1, 1, 1, 1, 1))
+
+    assert c.scoreboard.unresolved() == [unresolved]
+    assert any('ambiguous judge' in problem for problem in c.problems())
+
+    report = ConcoursReport(c)
+    averages = {str(cont): report.contestant_to_sp[cont].average() for cont in c.contestants}
+    assert averages == {'Kid Alpha': 40.0, 'Kid Beta': 30.0}
+
+    # Incrementally too
+    report.add_evaluations([evaluate(c, 'Roy', 'Kid Beta', (1, 1, 1, 1, 1))])
+    assert report.contestant_to_sp[c.get_contestant('Kid Beta')].average() == 30.0
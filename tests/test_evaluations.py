@@ -0,0 +1,91 @@
+from pathlib import Path
+
+import pytest
+
+from concours import *
+from parser import ConcoursParser, ScoreboardParser
+from evaluations import ConcoursReport
+
+def parse(inputs: tuple[Path, Path]) -> Concours:
+    c = ConcoursParser.parse(inputs[0])
+    ScoreboardParser.parse(inputs[1], c)
+    return c
+
+def snapshot(report: ConcoursReport) -> dict:
+    """Every scorepad's count and averages, by table and item, and each category's placed contestants."""
+    tables = {}
+    for name in ('contestant_to_sp', 'contestant_to_sp_adj', 'judge_to_sp', 'judge_to_sp_adj', 'category_to_sp',
+                 'sformat_to_sp', 'grade_to_sp', 'level_to_sp', 'duration_to_sp', 'school_to_sp_given',
+                 'school_to_sp_received'):
+        tables[name] = {
+            str(item): (sp.n, sp.average(), sp.averages(), sp.filter_traditional().n, sp.filter_impromptu().average())
+            for (item, sp) in getattr(report, name).items()
+        }
+
+    places = {str(cat): sorted(str(sp.item) for sp in sps) for (cat, sps) in report.category_to_places.items()}
+    return tables, places
+
+def assert_close(incremental: tuple, rebuilt: tuple):
+    """Averages may differ by 0.1 where one falls on a rounding boundary (see Scorepad)."""
+    (n, average, averages, n_traditional, average_impromptu) = incremental
+    (n_, average_, averages_, n_traditional_, average_impromptu_) = rebuilt
+
+    assert (n, n_traditional) == (n_, n_traditional_)
+    assert average == pytest.approx(average_, abs=0.11)
+    assert averages == pytest.approx(averages_, abs=0.11)
+    assert average_impromptu == pytest.approx(average_impromptu_, abs=0.11)
+
+@pytest.mark.parametrize('batches', [1, 7])
+def test_incremental_matches_rebuild(inputs: tuple[Path, Path], batches: int):
+    rebuilt = ConcoursReport(parse(inputs))
+
+    c = parse(inputs)
+    es = sorted(c.scoreboard.evaluations, key=lambda e: (e.contestant.name, e.judge.name if e.judge else ''))
+    (first, rest) = (es[:len(es) // 3], es[len(es) // 3:])
+
+    c.scoreboard.evaluations = set(first)
+    incremental = ConcoursReport(c)
+    for i in range(batches):
+        batch = rest[i::batches]
+        c.scoreboard.evaluations.update(batch)
+        incremental.add_evaluations(batch)
+
+    (tables, places) = snapshot(incremental)
+    (tables_, places_) = snapshot(rebuilt)
+
+    assert places == places_
+    for name in tables:
+        assert tables[name].keys() == tables_[name].keys(), name
+        for item in tables[name]:
+            assert_close(tables[name][item], tables_[name][item])
+
+def test_incremental_statistics_are_floats(inputs: tuple[Path, Path]):
+    c = parse(inputs)
+    es = sorted(c.scoreboard.evaluations, key=lambda e: (e.contestant.name, e.judge.name if e.judge else ''))
+
+    c.scoreboard.evaluations = set(es[:-10])
+    report = ConcoursReport(c)
+    for sp in report.category_to_sp.values():
+        sp.average()
+
+    c.scoreboard.evaluations.update(es[-10:])
+    report.add_evaluations(es[-10:])
+
+    for sp in report.category_to_sp.values():
+        assert type(sp.average()) is float
+        assert type(sp.variance()) is float
+        assert all(type(average) is float for average in sp.averages())
+
+def test_saved_school_reports_are_found_by_name_and_shortname(inputs: tuple[Path, Path]):
+    from main import school_report_path
+
+    c = parse(inputs)
+    paths = ConcoursReport(c).save_school_reports(workers=1)
+
+    directory = paths[0].parent
+    for school in c.schools:
+        path = school_report_path(directory, school.name)
+        assert path in paths
+        assert school_report_path(directory, school.shortname) == path
+
+    assert school_report_path(directory, 'No such school') is None
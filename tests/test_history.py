@@ -0,0 +1,65 @@
+from pathlib import Path
+import sqlite3
+
+from concours import *
+from parser import ConcoursParser, ScoreboardParser
+from history import HistoryStore
+
+def parse(inputs: tuple[Path, Path]) -> Concours:
+    c = ConcoursParser.parse(inputs[0])
+    ScoreboardParser.parse(inputs[1], c)
+    return c
+
+def evaluation_counts(history: HistoryStore) -> list[tuple[str, int, int]]:
+    return history.query('''
+        SELECT x.name, x.year, COUNT(e.id) FROM concours AS x LEFT JOIN evaluations AS e ON e.concours_id = x.id
+        GROUP BY x.id ORDER BY x.year
+    ''')
+
+def test_same_name_across_two_years(inputs: tuple[Path, Path], workdir: Path):
+    c = parse(inputs)
+    n = len(c.scoreboard.evaluations)
+
+    with HistoryStore(workdir / 'history.sqlite') as history:
+        history.save(c, 2023)
+        history.save(c, 2024)
+
+        assert history.concours() == [('concours', 2023), ('concours', 2024)]
+        assert evaluation_counts(history) == [('concours', 2023, n), ('concours', 2024, n)]
+
+        # Both years are grouped the same way, and agree since the inputs are the same
+        rows = history.averages('category')
+        assert {year for (_, year, *_) in rows} == {2023, 2024}
+        assert [row[2:] for row in rows if row[1] == 2023] == [row[2:] for row in rows if row[1] == 2024]
+
+    # Saving a year again replaces only that year, here without its scoreboard
+    c.scoreboard = None
+    with HistoryStore(workdir / 'history.sqlite') as history:
+        history.save(c, 2024)
+
+        assert evaluation_counts(history) == [('concours', 2023, n), ('concours', 2024, 0)]
+
+def test_older_database_is_keyed_on_name_and_year(inputs: tuple[Path, Path], workdir: Path):
+    path = workdir / 'history.sqlite'
+
+    # As saved before user_version 2: one concours per name
+    with HistoryStore(path) as history:
+        history.save(parse(inputs), 2023)
+    db = sqlite3.connect(path)
+    with db:
+        (n_before,) = db.execute('SELECT COUNT(*) FROM evaluations').fetchone()
+        db.execute('PRAGMA foreign_keys = OFF')
+        db.executescript('''
+            CREATE TABLE concours_old (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE, year INTEGER);
+            INSERT INTO concours_old SELECT * FROM concours;
+            DROP TABLE concours;
+            ALTER TABLE concours_old RENAME TO concours;
+            PRAGMA user_version = 0;
+        ''')
+    db.close()
+
+    with HistoryStore(path) as history:
+        history.save(parse(inputs), 2024)
+
+        assert evaluation_counts(history) == [('concours', 2023, n_before), ('concours', 2024, n_before)]
+        assert history.query('PRAGMA foreign_key_check') == []
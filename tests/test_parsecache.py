@@ -0,0 +1,39 @@
+from pathlib import Path
+import os
+
+import parsecache
+from parsecache import ParseCache
+
+def evaluations_key(c) -> list[tuple]:
+    return sorted((e.contestant.name, e.judge.name if e.judge else '', e.scores or ()) for e in c.scoreboard.evaluations)
+
+def test_cache_hit_returns_the_same_model(inputs: tuple[Path, Path], monkeypatch):
+    c = ParseCache.parse(*inputs)
+    assert ParseCache.path_for(*inputs).exists()
+
+    # A hit must not parse again
+    monkeypatch.setattr('parser.ConcoursParser.parse', None)
+    monkeypatch.setattr('parser.ConcurrentParser.parse', None)
+    cached = ParseCache.parse(*inputs)
+
+    assert sorted(s.name for s in cached.schools) == sorted(s.name for s in c.schools)
+    assert evaluations_key(cached) == evaluations_key(c)
+
+def test_touched_file_still_hits(inputs: tuple[Path, Path]):
+    ParseCache.parse(*inputs)
+    os.utime(inputs[1], ns=(0, 0))
+
+    assert ParseCache.load(*inputs) is not None
+
+def test_changed_file_misses(inputs: tuple[Path, Path]):
+    ParseCache.parse(*inputs)
+    with open(inputs[1], 'ab') as f:
+        f.write(b'\0')
+
+    assert ParseCache.load(*inputs) is None
+
+def test_other_version_misses(inputs: tuple[Path, Path], monkeypatch):
+    ParseCache.parse(*inputs)
+    monkeypatch.setattr(parsecache, 'CACHE_VERSION', parsecache.CACHE_VERSION + 1)
+
+    assert ParseCache.load(*inputs) is None
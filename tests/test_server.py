@@ -0,0 +1,63 @@
+from pathlib import Path
+import asyncio
+import json
+
+import pytest
+
+from concours import *
+from parser import ConcoursParser, ScoreboardParser
+from evaluations import ConcoursReport
+from server import LiveServer
+
+@pytest.fixture
+def server(inputs: tuple[Path, Path]) -> LiveServer:
+    c = ConcoursParser.parse(inputs[0])
+    ScoreboardParser.parse(inputs[1], c)
+    return LiveServer(ConcoursReport(c))
+
+def request(server: LiveServer, head: str, body: bytes=b'') -> tuple[int, str, dict]:
+    """Send one raw request to the server's handler; the status, content type and JSON body."""
+    async def exchange() -> bytes:
+        listener = await asyncio.start_server(server.handle, '127.0.0.1', 0)
+        (host, port) = listener.sockets[0].getsockname()[:2]
+
+        async with listener:
+            (reader, writer) = await asyncio.open_connection(host, port)
+            writer.write(head.replace('\n', '\r\n').encode() + b'\r\n' + body)
+            await writer.drain()
+            response = await reader.read()
+            writer.close()
+
+        return response
+
+    (head, _, body) = asyncio.run(exchange()).partition(b'\r\n\r\n')
+    (status_line, *header_lines) = head.decode('latin-1').split('\r\n')
+    headers = dict(line.lower().split(': ', 1) for line in header_lines)
+
+    return int(status_line.split()[1]), headers['content-type'], json.loads(body)
+
+def post(server: LiveServer, body: bytes, length: str=None) -> tuple[int, str, dict]:
+    length = str(len(body)) if length is None else length
+    return request(server, f'POST /evaluations HTTP/1.1\nContent-Length: {length}\n', body)
+
+def test_unknown_judge_is_a_json_error(server: LiveServer):
+    contestant = next(iter(server.report.c.contestants))
+    row = {'judge': 'Nobody', 'contestant': contestant.name, 'sformat': contestant.category.sformat}
+
+    (status, content_type, body) = post(server, json.dumps([row]).encode())
+
+    assert (status, content_type) == (400, 'application/json')
+    assert 'unknown judge' in body['error']
+    assert server.version == 0
+
+@pytest.mark.parametrize('length', ['abc', '-1', ''])
+def test_malformed_content_length_is_a_json_error(server: LiveServer, length: str):
+    (status, content_type, body) = post(server, b'[]', length)
+
+    assert (status, content_type) == (400, 'application/json')
+    assert body == {'error': 'Content-Length must be a number of bytes'}
+
+def test_unknown_path_and_method_are_json_errors(server: LiveServer):
+    assert request(server, 'GET /tables/nothing HTTP/1.1\n')[:2] == (404, 'application/json')
+    assert request(server, 'GET /nothing HTTP/1.1\n')[:2] == (404, 'application/json')
+    assert request(server, 'DELETE /evaluations HTTP/1.1\n')[:2] == (405, 'application/json')
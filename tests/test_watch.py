@@ -0,0 +1,39 @@
+from pathlib import Path
+import json
+
+from concours import *
+from parser import TextConverter
+from textparser import ConcoursTextParser, SUFFIX_JSONL, read_rows
+from evaluations import school_filenames
+from watch import Watcher
+
+def test_new_evaluations_rewrite_every_school_in_their_category(inputs: tuple[Path, Path], workdir: Path):
+    TextConverter.convert(*inputs, workdir / 'text', SUFFIX_JSONL)
+    concours_dir, evaluations_path = workdir / 'text' / 'concours', workdir / 'text' / 'evaluations.jsonl'
+    rows = list(read_rows(evaluations_path))
+
+    # Hold back one contestant's evaluations, in a category shared with other schools
+    c = ConcoursTextParser.parse(concours_dir)
+    evaluated = {row['contestant'] for row in rows}
+    cat = next(cat for cat in sorted(c.categories) if len({con.school for con in cat.contestants if con.name in evaluated}) > 1)
+    held = next(con for con in sorted(cat.contestants, key=lambda con: con.name) if con.name in evaluated)
+
+    lines = [json.dumps(row) + '\n' for row in rows]
+    evaluations_path.write_text(''.join(line for (row, line) in zip(rows, lines) if row['contestant'] != held.name))
+
+    watcher = Watcher(concours_dir, evaluations_path)
+    watcher.update([concours_dir, evaluations_path])
+
+    directory = workdir / 'src' / 'output' / 'schools_concours'
+    for path in directory.glob('*.txt'):
+        path.unlink()
+
+    with open(evaluations_path, 'a') as f:
+        f.writelines(line for (row, line) in zip(rows, lines) if row['contestant'] == held.name)
+    watcher.update([evaluations_path])
+
+    filenames = school_filenames(watcher.c.schools)
+    schools = {con.school.name for con in cat.contestants}
+    assert len(schools) > 1
+    assert {path.stem for path in directory.glob('*.txt')} == {filenames[s] for s in watcher.c.schools if s.name in schools}
+    assert len(watcher.c.scoreboard.evaluations) == len(rows)